@@ -1,20 +1,116 @@
+import os # Used to size the worker pool to the machine's CPU count.
+import re # Used for the lightweight ticker-list parser below.
 import pandas as pd
-import ast # Used to safely convert string representations of lists back into lists.
-import matplotlib.pyplot as plt # library for creating charts and graphs, from CodeSignal course. 
-
-# We import all the functions from our bot's decision engine and analyser modules. 
-from bot_modules.decision_engine import find_trade_signals, rank_signals, check_ma_crossover_signal
-from bot_modules.analyser import analyse_sentiment_of_headlines, setup_finbert_model
-
-def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-    # Calculates the Average True Range (ATR) for risk management
-    df = df.copy()
-    df['high-low'] = df['high'] - df['low']
-    df['high-prev_close'] = abs(df['high'] - df['close'].shift(1))
-    df['low-prev_close'] = abs(df['low'] - df['close'].shift(1))
-    df['tr'] = df[['high-low', 'high-prev_close', 'low-prev_close']].max(axis=1)
-    df['atr'] = df['tr'].ewm(alpha=1/period, adjust=False).mean()
-    return df
+import numpy as np # Used for the fast price arrays the simulation loop runs on.
+from concurrent.futures import ProcessPoolExecutor # Spreads per-ticker precompute across CPU cores.
+# Note: matplotlib is deliberately NOT imported here - see the plotting
+# section at the end of run_backtest for why.
+
+# We import all the functions from our bot's decision engine and analyser modules.
+from bot_modules.decision_engine import find_trade_signals, rank_signals, check_ma_crossover_values
+from bot_modules.analyser import analyse_sentiment_of_headlines, setup_finbert_model, pretokenize_headlines
+
+# numba is optional. When it's installed, the exit check below gets compiled to
+# native machine code the first time it runs. When it isn't, the exact same
+# function just runs as ordinary Python, so nothing breaks.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Matches each quoted symbol inside a stored ticker list like "['AAPL', 'MSFT']"
+# (or the JSON equivalent '["AAPL", "MSFT"]').
+_TICKER_LIST_RE = re.compile(r"""['"]([^'"]+)['"]""")
+
+def _parse_ticker_list(value: str) -> list:
+    """
+    Converts a stored ticker-list string back into a Python list of symbols.
+    The CSV column only ever holds flat lists of quoted ticker strings, so a
+    simple regex pulling out the quoted pieces does the job - there's no need
+    to run a full Python-expression parse (ast.literal_eval) on every row,
+    which is what made loading the news dataset slow.
+    """
+    return _TICKER_LIST_RE.findall(value)
+
+def _wilder_ema(tr, alpha):
+    """
+    The smoothed (Wilder) moving average used by the ATR, as a plain recurrence:
+    out[i] = alpha * tr[i] + (1 - alpha) * out[i-1], seeded with the first value.
+    This matches pandas' ewm(alpha=..., adjust=False).mean() exactly, but the
+    recurrence is inherently sequential so it can't be vectorised - it can,
+    however, be JIT-compiled by numba into a very tight native loop.
+    """
+    out = np.empty_like(tr)
+    out[0] = tr[0]
+    for i in range(1, tr.shape[0]):
+        out[i] = alpha * tr[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+if njit is not None:
+    _wilder_ema = njit(cache=True)(_wilder_ema)
+
+def _check_exits(stops, targets, sides, day_highs, day_lows):
+    """
+    Checks every open position against today's high/low in one pass.
+
+    All inputs are aligned NumPy arrays (one entry per open position, with
+    side = +1 for longs and -1 for shorts). Returns two arrays: an exit code
+    (0 = still open, 1 = take profit hit, 2 = stop loss hit) and the price
+    the exit would fill at. Keeping this as pure array maths is what lets
+    numba compile it down to simple float comparisons.
+    """
+    n = stops.shape[0]
+    exit_codes = np.zeros(n, dtype=np.int8)
+    exit_prices = np.zeros(n, dtype=np.float64)
+    for i in range(n):
+        if sides[i] == 1:  # Long position
+            if day_highs[i] >= targets[i]:
+                exit_codes[i] = 1
+                exit_prices[i] = targets[i]
+            elif day_lows[i] <= stops[i]:
+                exit_codes[i] = 2
+                exit_prices[i] = stops[i]
+        else:  # Short position: take_profit is below entry, stop_loss above.
+            if day_lows[i] <= targets[i]:
+                exit_codes[i] = 1
+                exit_prices[i] = targets[i]
+            elif day_highs[i] >= stops[i]:
+                exit_codes[i] = 2
+                exit_prices[i] = stops[i]
+    return exit_codes, exit_prices
+
+if njit is not None:
+    _check_exits = njit(cache=True)(_check_exits)
+
+def calculate_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    # Calculates the Average True Range (ATR) for risk management.
+    # Works directly on the raw price arrays and returns only the ATR array -
+    # no DataFrame copy, no throwaway columns, just the numbers we need.
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan # There is no "previous close" on the first day.
+    prev_close[1:] = close[:-1]
+    # np.fmax ignores NaN (like pandas' max does), so day one falls back to high-low.
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return _wilder_ema(tr, 1.0 / period)
+
+def _precompute_ticker(ticker: str, frame: pd.DataFrame):
+    """
+    Builds every per-ticker array the simulation loop needs: the raw
+    high/low/open arrays, the full ATR series, and the final fast/slow SMA
+    values for the crossover check. Lives at module level (rather than inside
+    run_backtest) so ProcessPoolExecutor can pickle it and run one ticker per
+    worker process.
+    """
+    high = frame['High'].to_numpy()
+    low = frame['Low'].to_numpy()
+    open_ = frame['Open'].to_numpy()
+    close = frame['Close'].to_numpy()
+    atr = calculate_atr(high, low, close)
+    # The crossover check only ever looks at the final value of each SMA,
+    # so we keep just those last values instead of the whole rolling series.
+    fast_sma_last = frame['Close'].rolling(window=20).mean().iloc[-1]
+    slow_sma_last = frame['Close'].rolling(window=50).mean().iloc[-1]
+    return (ticker, high, low, open_, close, atr, fast_sma_last, slow_sma_last)
 
 def run_backtest():
     """
@@ -26,13 +122,22 @@ def run_backtest():
     # We load our two key historical datasets: one for news events and one for prices.
     try:
         news_df = pd.read_csv('data/historical_news_dataset.csv', parse_dates=['timestamp'])
-        price_df = pd.read_csv('data/historical_price_data.csv', header=[0, 1], index_col=0, parse_dates=True)
+        # Prefer the Parquet price file when get_price_data.py has produced
+        # one - it loads far faster than re-parsing the CSV text every run.
+        # Its columns were flattened to 'Close_AAPL' style names for the
+        # Parquet schema, so we split them back into the (field, ticker)
+        # MultiIndex the rest of this function expects.
+        try:
+            price_df = pd.read_parquet('data/historical_price_data.parquet')
+            price_df.columns = pd.MultiIndex.from_tuples([tuple(c.split('_', 1)) for c in price_df.columns])
+        except (FileNotFoundError, OSError, ImportError):
+            price_df = pd.read_csv('data/historical_price_data.csv', header=[0, 1], index_col=0, parse_dates=True)
     except FileNotFoundError as e:
         print(f"Error: Make sure you have created the data files. {e}")
         return
     
     # We must convert the string representations of lists in our CSV files back into actual Python lists.
-    news_df['tickers'] = news_df['tickers'].apply(ast.literal_eval)
+    news_df['tickers'] = [_parse_ticker_list(s) for s in news_df['tickers'].to_numpy()]
 
     # 2. Setup the Simulation
     # Load the AI model once at the start to be efficient.
@@ -48,7 +153,52 @@ def run_backtest():
     trade_log = [] # A detailed log of every trade made.
     portfolio_value_log = [] # A daily log of our total portfolio value.
     
-    cash_at_risk_per_trade = 0.05 # We'll risk 5% of the current cash on any new trade. 
+    cash_at_risk_per_trade = 0.05 # We'll risk 5% of the current cash on any new trade.
+
+    # Precompute everything the daily loop needs as plain NumPy arrays.
+    # Looking prices up with price_df.loc[date_str, ('High', ticker)] goes through
+    # pandas' MultiIndex machinery every single time, which is thousands of times
+    # slower than indexing into a plain array. We pay the pandas cost once here,
+    # outside the loop, and the loop itself only ever touches ndarrays.
+    print("\nPrecomputing price arrays and ATR for each ticker...")
+    # This dict maps a calendar date to its row number in the price data,
+    # so the loop can turn "today" into an array index in O(1).
+    dates_idx = {d: i for i, d in enumerate(price_df.index.date)}
+    price_tickers = price_df.columns.get_level_values(1).unique()
+    highs, lows, opens, closes, atrs = {}, {}, {}, {}, {}
+    fast_sma_last, slow_sma_last = {}, {}
+    # Each ticker's precompute (ATR + SMAs + array extraction) is completely
+    # independent of the others, so it's farmed out to a process pool. Only
+    # the single-ticker slice is sent to each worker, which keeps the amount
+    # of data pickled between processes small.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        jobs = [pool.submit(_precompute_ticker, t, price_df.xs(t, level=1, axis=1)) for t in price_tickers]
+        for job in jobs:
+            t, high, low, open_, close, atr, fast_last, slow_last = job.result()
+            highs[t] = high
+            lows[t] = low
+            opens[t] = open_
+            closes[t] = close
+            atrs[t] = atr
+            fast_sma_last[t] = fast_last
+            slow_sma_last[t] = slow_last
+
+    # Score the ENTIRE news timeline in one FinBERT pass before the simulation
+    # starts. Sentiment depends only on the headline text, never on prices, so
+    # doing it up front can't leak any future information into the backtest -
+    # and one big pass gives the model full batches instead of the handful of
+    # headlines any single day would provide.
+    print("\nAnalysing sentiment for the full news timeline...")
+    # The historical corpus never changes between runs, so its tokenization
+    # is cached to disk - repeat backtests (e.g. while tuning parameters)
+    # skip the tokenizer entirely.
+    pretokenize_headlines(news_df['title'].tolist(), finbert_tokenizer, 'data/news_tokens.npz')
+    news_df = analyse_sentiment_of_headlines(news_df, finbert_tokenizer, finbert_model)
+
+    # Group the news by calendar day once, up front. The loop previously
+    # re-scanned the whole news DataFrame with a boolean mask every single
+    # simulated day; now "today's news" is a single dict lookup.
+    news_by_date = {d: g for d, g in news_df.groupby(news_df['timestamp'].dt.date)}
 
     print(f"\nBacktest period: {start_date} to {end_date}")
     print(f"Starting cash: ${start_cash:,.2f}")
@@ -57,78 +207,100 @@ def run_backtest():
     # This loop iterates through every single day in our historical period.
     for current_date in pd.date_range(start=start_date, end=end_date):
         date_str = current_date.strftime('%Y-%m-%d')
-        
+        # Turn today's date into a row number once. A None here means a
+        # weekend/holiday with no price data, so there is nothing to index.
+        row = dates_idx.get(current_date.date())
+
         # a) Manage Open Positions (Check for Exits)
         # Before doing anything else, we check if our open trades have hit their targets.
-        for ticker in list(portfolio['positions'].keys()):
-            position = portfolio['positions'][ticker]
-            try:
-                todays_high = price_df.loc[date_str, ('High', ticker)]
-                todays_low = price_df.loc[date_str, ('Low', ticker)]
-
-                # Check buy positions
-                if position['signal'] == 'BUY':
-                    if todays_high >= position['take_profit']:
-                        exit_price = position['take_profit']
-                        portfolio['cash'] += position['quantity'] * exit_price
-                        print(f"  - EXIT {ticker} (TAKE PROFIT) at ${exit_price:.2f}")
-                        trade_log.append((current_date, 'EXIT_TP', ticker, position['quantity'], exit_price))
-                        del portfolio['positions'][ticker]
-                    elif todays_low <= position['stop_loss']:
-                        exit_price = position['stop_loss']
-                        portfolio['cash'] += position['quantity'] * exit_price
-                        print(f"  - EXIT {ticker} (STOP LOSS) at ${exit_price:.2f}")
-                        trade_log.append((current_date, 'EXIT_SL', ticker, position['quantity'], exit_price))
-                        del portfolio['positions'][ticker]
-
-                # Check sell positions (Shorts)
-                elif position['signal'] == 'SELL':
-                    if todays_low <= position['take_profit']: # Note: take_profit is a lower price for sells
-                        exit_price = position['take_profit']
-                        portfolio['cash'] += position['quantity'] * exit_price
-                        print(f"  - COVER {ticker} (TAKE PROFIT) at ${exit_price:.2f}")
-                        trade_log.append((current_date, 'EXIT_TP', ticker, position['quantity'], exit_price))
-                        del portfolio['positions'][ticker]
-                    elif todays_high >= position['stop_loss']: # Note: stop_loss is a higher price for sells
-                        exit_price = position['stop_loss']
-                        portfolio['cash'] += position['quantity'] * exit_price
-                        print(f"  - COVER {ticker} (STOP LOSS) at ${exit_price:.2f}")
-                        trade_log.append((current_date, 'EXIT_SL', ticker, position['quantity'], exit_price))
-                        del portfolio['positions'][ticker]
-            except KeyError:
-                # This handles weekends/holidays where we might have a position but no price data for that day.
-                pass
+        # Only on days the market actually traded (row is None on weekends/holidays).
+        # The positions dict is packed into parallel arrays, checked in one
+        # _check_exits call (compiled by numba when available), and then the
+        # handful of actual exits are applied back to the portfolio.
+        if row is not None and portfolio['positions']:
+            # Phase one: a read-only scan over the positions dict. Iterating
+            # .items() directly (no list(keys()) copy) is fine here because
+            # nothing is removed until phase two below.
+            open_tickers = []
+            stops, targets, sides, day_highs, day_lows = [], [], [], [], []
+            for ticker, position in portfolio['positions'].items():
+                open_tickers.append(ticker)
+                stops.append(position['stop_loss'])
+                targets.append(position['take_profit'])
+                sides.append(1 if position['signal'] == 'BUY' else -1)
+                day_highs.append(highs[ticker][row])
+                day_lows.append(lows[ticker][row])
+
+            exit_codes, exit_prices = _check_exits(
+                np.array(stops), np.array(targets), np.array(sides, dtype=np.int8),
+                np.array(day_highs), np.array(day_lows))
+
+            # Phase two: apply the exits, deferring the dict removals until
+            # after we've finished reading from it.
+            to_remove = []
+            for i, ticker in enumerate(open_tickers):
+                if exit_codes[i] == 0:
+                    continue # Position is still open.
+                position = portfolio['positions'][ticker]
+                exit_price = float(exit_prices[i])
+                portfolio['cash'] += position['quantity'] * exit_price
+                action = 'EXIT' if position['signal'] == 'BUY' else 'COVER'
+                if exit_codes[i] == 1:
+                    print(f"  - {action} {ticker} (TAKE PROFIT) at ${exit_price:.2f}")
+                    trade_log.append((current_date, 'EXIT_TP', ticker, position['quantity'], exit_price))
+                else:
+                    print(f"  - {action} {ticker} (STOP LOSS) at ${exit_price:.2f}")
+                    trade_log.append((current_date, 'EXIT_SL', ticker, position['quantity'], exit_price))
+                to_remove.append(ticker)
+            for ticker in to_remove:
+                del portfolio['positions'][ticker]
 
         # b) Check for new trade signals
-        todays_news = news_df[news_df['timestamp'].dt.date == current_date.date()]
-        if not todays_news.empty:
+        # A None here means there was no news at all today, which skips the
+        # whole signal block (and the FinBERT call) with one cheap check.
+        todays_news = news_by_date.get(current_date.date())
+        if todays_news is not None:
             print(f"\nSimulating day: {date_str} - {len(todays_news)} news item(s) found.")
-            analysed_news = analyse_sentiment_of_headlines(todays_news, finbert_tokenizer, finbert_model)
-            signals = find_trade_signals(analysed_news, confidence_threshold=0.90)
+            # The sentiment columns were filled in by the single pre-loop
+            # FinBERT pass, so we go straight to signal filtering here.
+            signals = find_trade_signals(todays_news, confidence_threshold=0.90)
             
             if not signals.empty:
                 ranked_signals = rank_signals(signals)
+                # Size every candidate signal in one vectorised pass: gather
+                # all the open prices into an array and do a single divide +
+                # round, instead of a Python round() per candidate. Candidates
+                # with no price data today simply size to NaN.
+                candidate_tickers = [tks[0] if tks else '' for tks in ranked_signals['tickers']]
+                candidate_opens = np.array([
+                    opens[t][row] if (row is not None and t in opens) else np.nan
+                    for t in candidate_tickers])
+                position_size_cash = portfolio['cash'] * cash_at_risk_per_trade
+                with np.errstate(invalid='ignore'):
+                    candidate_quantities = np.round(position_size_cash / candidate_opens)
+
                 top_signal = ranked_signals.iloc[0]
-                ticker = top_signal['tickers'][0]
+                ticker = candidate_tickers[0]
                 sentiment_signal = top_signal['signal']
 
                 if ticker not in portfolio['positions']:
                     print(f"  - Sentiment signal found: {sentiment_signal} {ticker}")
                     try:
-                        # Get the technical signal for confirmation
-                        ticker_prices = price_df.xs(ticker, level=1, axis=1).copy()
-                        ticker_prices.columns = ticker_prices.columns.str.lower()
-                        technical_signal = check_ma_crossover_signal(ticker_prices)
+                        # Get the technical signal for confirmation, using the
+                        # SMA values we precomputed before the loop.
+                        technical_signal = check_ma_crossover_values(fast_sma_last[ticker], slow_sma_last[ticker])
                         print(f"  - Technical signal is: {technical_signal}")
-                        
+
                         if sentiment_signal == technical_signal:
                             print(f"  - CONFIRMED: Signals match. Proceeding with trade.")
-                            entry_price = price_df.loc[date_str, ('Open', ticker)]
-                            ticker_prices = calculate_atr(ticker_prices)
-                            atr = ticker_prices.loc[date_str, 'atr']
-                            
-                            position_size_cash = portfolio['cash'] * cash_at_risk_per_trade
-                            quantity = round(position_size_cash / entry_price)
+                            if row is None:
+                                raise KeyError(date_str) # No trading day, so no entry price.
+                            entry_price = opens[ticker][row]
+                            atr = atrs[ticker][row]
+
+                            # The size was already computed in the vectorised
+                            # pass above; the top candidate is element 0.
+                            quantity = 0 if np.isnan(candidate_quantities[0]) else int(candidate_quantities[0])
 
                             if quantity > 0:
                                 cost = quantity * entry_price
@@ -146,12 +318,14 @@ def run_backtest():
                         print(f"  - Could not find sufficient price data for {ticker} on {date_str}. Skipping trade.")
         
         # c) Record Daily Portfolio Value
+        # Mark open positions to market using the precomputed close arrays.
+        # On non-trading days (row is None) we fall back to the entry price,
+        # just like the old KeyError fallback did.
         positions_value = 0
         for ticker, pos in portfolio['positions'].items():
-            try:
-                current_price = price_df.loc[date_str, ('Close', ticker)]
-                positions_value += pos['quantity'] * current_price
-            except KeyError:
+            if row is not None:
+                positions_value += pos['quantity'] * closes[ticker][row]
+            else:
                 positions_value += pos['quantity'] * pos['entry_price']
         
         total_value = portfolio['cash'] + positions_value
@@ -168,7 +342,18 @@ def run_backtest():
 
     # Create a DataFrame from our daily value log for easy plotting.
     portfolio_df = pd.DataFrame(portfolio_value_log, columns=['Date', 'Value']).set_index('Date')
-    
+
+    # matplotlib is imported here, only once we actually have results to
+    # draw. Importing it at module load pulls in a GUI backend and costs
+    # hundreds of milliseconds for every run, including headless/CI ones
+    # that never show a window. When there's no display we switch to the
+    # 'Agg' backend (pure rendering, no GUI) and just save the chart.
+    import matplotlib
+    headless = os.name != 'nt' and not os.environ.get('DISPLAY')
+    if headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
     # Uses matplotlib to create the equity curve chart.
     plt.figure(figsize=(12, 6))
     plt.plot(portfolio_df.index, portfolio_df['Value'], label='Sentiment + Technical Strategy')
@@ -177,7 +362,12 @@ def run_backtest():
     plt.ylabel('Portfolio Value ($)')
     plt.legend()
     plt.grid(True)
-    plt.show()
+    # Always keep a PNG of the run; only pop the blocking window when a
+    # display is actually available.
+    plt.savefig('equity_curve.png')
+    print("Equity curve saved to equity_curve.png")
+    if not headless:
+        plt.show()
 
 if __name__ == '__main__':
     run_backtest()
\ No newline at end of file
@@ -1,8 +1,137 @@
+import os
 import torch #The main library for PyTorch, which is the deep learning framework the FinBERT model is built on.
+import numpy as np
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification 
+from types import SimpleNamespace # Used by the ONNX wrapper to mimic the HF model's output object.
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
 # key library from Hugging Face that gives us access to pre-trained models like FinBERT.
 
+# onnxruntime is optional. On CPU-only machines it runs the same FinBERT
+# graph 3-5x faster than eager PyTorch (fused attention/LayerNorm kernels
+# plus INT8 matrix multiplies), so we use it when it's installed and quietly
+# stick with PyTorch when it isn't.
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError:
+    ort = None
+
+# A simple memoisation cache mapping headline text -> (sentiment, confidence),
+# kept separately per model (keyed by the checkpoint path stamped onto the
+# model when it's loaded) so that scoring the same headlines with two
+# different models - as the evaluation script does - never serves one
+# model's answers from the other's cache. A single
+# BERT forward pass is by far the most expensive thing this bot does, so a
+# repeated headline should only ever pay that cost once per model per process.
+_sentiment_cache: dict = {}
+
+# A second cache, one level down: headline text -> its tokenized encoding
+# (input ids, attention mask, ...). Subword tokenization is pure Python/Rust
+# string work that produces the same output every time for the same headline,
+# so there's no reason to redo it. pretokenize_headlines below can fill this
+# from disk for a fixed corpus like the backtest's news timeline.
+_token_cache: dict = {}
+
+def pretokenize_headlines(headlines, tokenizer, cache_path: str):
+    """
+    Tokenizes a fixed corpus of headlines once and persists the encodings to
+    an .npz file next to the data. On later runs with the same corpus the
+    encodings are loaded straight from disk, which takes tokenization off the
+    critical path entirely - handy when re-running the backtest over and over
+    while tuning strategy parameters.
+    """
+    unique = list(dict.fromkeys(str(h) for h in headlines))
+
+    # Try the on-disk cache first. The stored headline list must match the
+    # corpus exactly, otherwise we re-tokenize (e.g. after the dataset grew).
+    if os.path.exists(cache_path):
+        try:
+            saved = np.load(cache_path, allow_pickle=True)
+            if list(saved['headlines']) == unique:
+                keys = [k for k in saved.files if k != 'headlines']
+                for j, headline in enumerate(unique):
+                    _token_cache[headline] = {k: list(saved[k][j]) for k in keys}
+                print(f"Loaded cached tokenization for {len(unique)} headlines from {cache_path}")
+                return
+        except Exception as e:
+            print(f"Could not use token cache {cache_path} ({e}). Re-tokenizing.")
+
+    encodings = tokenizer(unique, truncation=True, max_length=128)
+    keys = list(encodings.keys())
+    for j, headline in enumerate(unique):
+        _token_cache[headline] = {k: encodings[k][j] for k in keys}
+
+    # The encodings are ragged (every headline has a different length), so
+    # each field is stored as an object array of lists.
+    arrays = {}
+    for k in keys:
+        arr = np.empty(len(unique), dtype=object)
+        arr[:] = encodings[k]
+        arrays[k] = arr
+    headline_arr = np.empty(len(unique), dtype=object)
+    headline_arr[:] = unique
+    np.savez(cache_path, headlines=headline_arr, **arrays)
+    print(f"Tokenized {len(unique)} headlines and cached them to {cache_path}")
+
+
+class _OnnxFinbert:
+    """
+    A small adapter that makes an onnxruntime session look enough like the
+    HuggingFace model that analyse_sentiment_of_headlines can use either one
+    without caring which it got: it reports a CPU device via parameters(),
+    takes the tokenizer's tensors as keyword arguments, and returns an object
+    with a .logits tensor.
+    """
+    def __init__(self, session):
+        self._session = session
+        self._dummy_param = torch.zeros(1) # Only exists so parameters() can report a device.
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    def parameters(self):
+        yield self._dummy_param
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        # Feed only the tensors the exported graph actually declares
+        # (e.g. BERT's token_type_ids may or may not be part of the export).
+        feeds = {name: tensor.numpy() for name, tensor in inputs.items() if name in self._input_names}
+        logits = self._session.run(['logits'], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+def _setup_onnx_session(model, tokenizer):
+    """
+    Exports the loaded FinBERT model to ONNX (once - the exported files are
+    kept next to the bot), applies dynamic INT8 quantization to the linear
+    layers, and returns the wrapped onnxruntime session. Returns None if
+    anything goes wrong so the caller can fall back to the PyTorch model.
+    """
+    onnx_path = 'finbert.onnx'
+    int8_path = 'finbert.int8.onnx'
+    try:
+        if not os.path.exists(int8_path):
+            print("Exporting FinBERT to ONNX with INT8 quantization (one-off)...")
+            dummy = tokenizer("export warmup headline", return_tensors='pt')
+            torch.onnx.export(
+                model,
+                (dummy['input_ids'], dummy['attention_mask']),
+                onnx_path,
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['logits'],
+                # Both batch size and headline length vary call to call.
+                dynamic_axes={'input_ids': {0: 'batch', 1: 'seq'},
+                              'attention_mask': {0: 'batch', 1: 'seq'},
+                              'logits': {0: 'batch'}},
+                opset_version=17,
+            )
+            quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+        session = ort.InferenceSession(int8_path, providers=['CPUExecutionProvider'])
+        print("FinBERT running via ONNX Runtime (INT8, CPU).")
+        return _OnnxFinbert(session)
+    except Exception as e:
+        print(f"ONNX export failed ({e}). Falling back to the PyTorch model.")
+        return None
 
 def setup_finbert_model():
     """
@@ -19,54 +148,179 @@ def setup_finbert_model():
     
     try:
         # Load the tokenizer and model from your local, fine-tuned folder.
-        tokenizer = AutoTokenizer.from_pretrained(model_path)
-        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        # use_fast picks the Rust tokenizer, which is much quicker than the
+        # pure-Python one (it's the default, but we rely on it so be explicit).
+        tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+        # use_safetensors prefers the .safetensors weight file, which is
+        # memory-mapped straight from disk instead of unpickled - noticeably
+        # faster to load and safe against malicious pickles. If the folder
+        # only holds an old pytorch_model.bin, fall back to loading that.
+        try:
+            model = AutoModelForSequenceClassification.from_pretrained(model_path, use_safetensors=True)
+        except OSError:
+            model = AutoModelForSequenceClassification.from_pretrained(model_path)
         print("Custom model loaded successfully")
     except OSError:
         # This code runs if the 'my_custom_finbert_model' folder is not found.
         print(f"Custom model not found at {model_path}. Falling back to default model.")
-        default_path = "ProsusAI/finbert"
-        tokenizer = AutoTokenizer.from_pretrained(default_path)
-        model = AutoModelForSequenceClassification.from_pretrained(default_path)
+        model_path = "ProsusAI/finbert"
+        tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+
+    # Stamp the model with where it came from. The sentiment cache uses this
+    # as its key, so results from different checkpoints never mix.
+    model._sentiment_cache_key = model_path
+
+    # If there's a GPU available, move the model onto it and switch to half
+    # precision (FP16). Halving the size of every weight doubles the effective
+    # memory bandwidth and lets the GPU's tensor cores do the matmuls, which
+    # roughly doubles inference throughput. On a CPU-only machine we keep the
+    # model in full precision, where FP16 would actually be slower.
+    if torch.cuda.is_available():
+        print("CUDA available - running FinBERT on the GPU in FP16.")
+        model = model.to('cuda').half()
+        model.eval()
+        # torch.compile fuses the model's ops into optimised kernels;
+        # 'reduce-overhead' additionally captures CUDA graphs, which pays off
+        # for the small batches this bot sends. Compilation happens on the
+        # first forward pass, so we trigger it here with a throwaway warmup
+        # headline rather than stalling the first real news cycle. Older
+        # torch builds without compile support just run the eager model.
+        try:
+            model = torch.compile(model, mode='reduce-overhead')
+            warmup = tokenizer(['warmup headline'], return_tensors='pt').to('cuda')
+            with torch.inference_mode():
+                model(**warmup)
+        except Exception as e:
+            print(f"torch.compile unavailable ({e}); running the eager model.")
+        return tokenizer, model
+    elif ort is not None:
+        # No GPU: try the quantized ONNX Runtime session instead, which is
+        # much faster than eager PyTorch on CPU. If the export fails for any
+        # reason we simply keep the PyTorch model.
+        onnx_model = _setup_onnx_session(model, tokenizer)
+        if onnx_model is not None:
+            onnx_model._sentiment_cache_key = 'onnx:' + model_path
+            return tokenizer, onnx_model
+    model.eval() # Inference only; disables dropout etc.
 
     return tokenizer, model
 
-def analyse_sentiment_of_headlines(news_df: pd.DataFrame, tokenizer, model) -> pd.DataFrame:
+def analyse_sentiment_of_headlines(news_df: pd.DataFrame, tokenizer, model, batch_size: int = None) -> pd.DataFrame:
     """
     Analyses the sentiment of each headline in the provided DataFrame.
     This function uses "batch processing" to analyse many headlines without
     running out of memory, which is essential for running on a local machine.
+    batch_size lets callers tune how many headlines go through the model at
+    once; left as None it picks a sensible default for the device.
     """
     if news_df.empty:
         return news_df
 
     headlines = news_df['title'].tolist()
-    batch_size = 16 # We'll process 16 headlines at a time. 16 was picked because of issues with
-    # RAM when running locally. This can be increased depending on hardware. 
 
-    # We'll store the results for all batches in these lists.
-    all_sentiments = []
-    all_confidences = []
-    
-    # This loop iterates through our list of headlines, one batch at a time.
-    for i in range(0, len(headlines), batch_size):
-        batch = headlines[i:i+batch_size]
-        
-        # The tokenizer converts the batch of text headlines
-        # into a format of numbered tokens that the AI model can understand.
-        inputs = tokenizer(batch, padding=True, truncation=True, return_tensors='pt')
-
-        # 'torch.no_grad()' is a performance optimisation. It tells PyTorch that
-        # we are only doing inference (making predictions), not training, so it
-        # doesn't need to calculate gradients, which saves memory and computation.
-        with torch.no_grad():
+    # We'll store the results for all headlines in these lists, slotting each
+    # result into its original position.
+    all_sentiments = [None] * len(headlines)
+    all_confidences = [0.0] * len(headlines)
+
+    # First, check the cache. Any headline we've scored before (the same wire
+    # story often shows up on several feeds, and the backtester revisits the
+    # same news) is answered instantly without touching the model. Only the
+    # genuinely new headlines go through the expensive forward pass below.
+    # The cache is keyed by the checkpoint path the setup functions stamp on
+    # the model - not id(model), whose value gets recycled once a model is
+    # garbage collected and could hand one model another model's cached
+    # results. A model without a stamp keys on the object itself; the cache
+    # then holds a reference to it, so that key can never be reused either.
+    cache_key = getattr(model, '_sentiment_cache_key', None)
+    if cache_key is None:
+        cache_key = model
+    model_cache = _sentiment_cache.setdefault(cache_key, {})
+    todo_indices = []
+    todo_headlines = []
+    for i, headline in enumerate(headlines):
+        cached = model_cache.get(headline)
+        if cached is not None:
+            all_sentiments[i], all_confidences[i] = cached
+        else:
+            todo_indices.append(i)
+            todo_headlines.append(headline)
+
+    # Work out where the model lives, and size the batches accordingly.
+    # 16 was the safe number for local CPU RAM; a GPU can comfortably take
+    # far bigger batches, which amortises the per-batch launch overhead.
+    # (ONNX Runtime wrappers from optimum don't expose parameters(), so fall
+    # back to CPU for anything that isn't a plain PyTorch module.)
+    try:
+        device = next(model.parameters()).device
+    except (AttributeError, StopIteration, TypeError):
+        device = torch.device('cpu')
+    if batch_size is None:
+        batch_size = 128 if device.type == 'cuda' else 16
+
+    # Tokenize everything up front WITHOUT padding, so we know each headline's
+    # real token length. We then process the headlines in length order: every
+    # batch contains similarly sized headlines and only gets padded to the
+    # longest headline *in that batch*, instead of a short headline being
+    # padded out to match an unrelated long one. Less padding = fewer wasted
+    # tokens fed through the model.
+    if todo_headlines:
+        # Headlines that were already tokenized (either earlier in this
+        # process or loaded from disk by pretokenize_headlines) skip the
+        # tokenizer; only genuinely new text gets tokenized here.
+        missing = [h for h in todo_headlines if h not in _token_cache]
+        if missing:
+            # Headlines are short; capping at 128 tokens keeps the occasional
+            # run-on title from forcing a huge padded batch.
+            fresh = tokenizer(missing, truncation=True, max_length=128)
+            keys = list(fresh.keys())
+            for j, headline in enumerate(missing):
+                _token_cache[headline] = {k: fresh[k][j] for k in keys}
+        else:
+            keys = list(_token_cache[todo_headlines[0]].keys())
+        encodings = {k: [_token_cache[h][k] for h in todo_headlines] for k in keys}
+        lengths = [len(ids) for ids in encodings['input_ids']]
+        order = sorted(range(len(todo_headlines)), key=lambda j: lengths[j])
+    else:
+        # Everything was already in the cache - nothing to run.
+        encodings, order = {}, []
+
+    # This loop iterates through the uncached headlines, one length-bucketed
+    # batch at a time.
+    for i in range(0, len(order), batch_size):
+        batch_positions = order[i:i+batch_size]
+
+        # tokenizer.pad takes the already-tokenized headlines and pads them
+        # to the longest sequence in this bucket only.
+        features = [{key: encodings[key][j] for key in encodings} for j in batch_positions]
+        inputs = tokenizer.pad(features, return_tensors='pt')
+
+        # Move the token tensors to whichever device the model lives on
+        # (the GPU when one was detected in setup_finbert_model, otherwise CPU).
+        if device.type != 'cpu':
+            inputs = {k: v.to(device, non_blocking=True) for k, v in inputs.items()}
+
+        # 'torch.inference_mode()' is a performance optimisation. It tells
+        # PyTorch we are only making predictions, not training, so it skips
+        # gradient bookkeeping entirely - it's a strictly faster version of
+        # the older torch.no_grad().
+        with torch.inference_mode():
             # The tokenized text is fed into the model.
             # The model outputs its raw, uncalibrated scores, called 'logits'.
-            outputs = model(**inputs)
+            if device.type == 'cuda':
+                # autocast runs the matmuls in FP16 on the tensor cores while
+                # keeping the numerically sensitive bits (softmax) in FP32.
+                with torch.autocast(device_type='cuda', dtype=torch.float16):
+                    outputs = model(**inputs)
+            else:
+                outputs = model(**inputs)
 
         # Softmax: The softmax function converts the raw logits into a set of
         # probabilities for each class (positive, negative, neutral) that sum to 1.
-        predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        # The .float() upcasts FP16 logits before the softmax, and the single
+        # .cpu() call copies the small result tensor back in one transfer.
+        predictions = torch.nn.functional.softmax(outputs.logits.float(), dim=-1).cpu()
 
         # Now we find the label with the highest probability for each headline.
         labels = ["positive", "negative", "neutral"]
@@ -74,10 +328,14 @@ def analyse_sentiment_of_headlines(news_df: pd.DataFrame, tokenizer, model) -> p
         batch_sentiments = [labels[torch.argmax(p)] for p in predictions]
         # `torch.max` finds the value of the highest probability (our confidence score).
         batch_confidences = [torch.max(p).item() for p in predictions]
-        
-        # Add the results of this batch to our master lists.
-        all_sentiments.extend(batch_sentiments)
-        all_confidences.extend(batch_confidences)
+
+        # Slot the results back into their original positions (undoing the
+        # length sort) and remember them in the cache for next time.
+        for j, (sentiment, confidence) in enumerate(zip(batch_sentiments, batch_confidences)):
+            original_index = todo_indices[batch_positions[j]]
+            all_sentiments[original_index] = sentiment
+            all_confidences[original_index] = confidence
+            model_cache[headlines[original_index]] = (sentiment, confidence)
 
     # Add the complete lists of results as new columns to the DataFrame.
     analysed_df = news_df.copy()
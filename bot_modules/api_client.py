@@ -1,17 +1,37 @@
 import os #This is to interact with environment variables.
 import requests # imported for HTTP requests
 import pandas as pd # For data manipulation and analysis, used for structured table
-from dotenv import load_dotenv #for .env file handling for my API Keys for alpaca and marketaux. 
+from dotenv import load_dotenv #for .env file handling for my API Keys for alpaca and marketaux.
+from requests.adapters import HTTPAdapter # lets us tune connection pooling and retries.
+from urllib3.util import Retry # the retry policy used by the adapter below.
 
-def fetch_api_news(symbols: list, api_key: str) -> pd.DataFrame:
+# One shared session for every API call this module makes. Reusing a session
+# keeps the TCP+TLS connection to the API open between calls, so we only pay
+# the handshake cost (tens of milliseconds) once instead of on every fetch.
+# The retry policy transparently re-attempts the request on rate limits and
+# transient server errors, with a small backoff between attempts.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
+# Asking for gzip makes the API compress its JSON response (~5x smaller on
+# the wire); requests decompresses it for us automatically.
+_session.headers.update({'Accept-Encoding': 'gzip'})
+
+def fetch_api_items(symbols: list, api_key: str) -> list:
     """
-    Fetches news for a specific list of stock symbols from the MarketAux API.
+    Fetches news for a specific list of stock symbols from the MarketAux API
+    and returns a plain list of dicts, one per article, with the publication
+    date still as its raw ISO string. The news manager consumes this record
+    form directly; fetch_api_news below wraps it into a clean DataFrame.
     """
     # Firstly a safety check. If the API key wasn't loaded correctly,
-    # An error is printedand returns an empty DataFrame to prevent the script from crashing.
+    # An error is printed and returns an empty list to prevent the script from crashing.
     if not api_key:
         print("Error: MARKETAUX_API_KEY not found. Please check your .env file.")
-        return pd.DataFrame()
+        return []
 
     
     # Code below is for requests. This is the "conversation" we have with the API.
@@ -38,8 +58,10 @@ def fetch_api_news(symbols: list, api_key: str) -> pd.DataFrame:
     # It allows us to handle network errors without crashing the whole bot.
     try:
         # This is the line that actually sends our request over the internet.
-        # The requests library combines the base_url and our params into a full URL.
-        response = requests.get(base_url, params=params)
+        # The shared session combines the base_url and our params into a full
+        # URL and reuses its pooled connection. The timeout tuple is
+        # (seconds to connect, seconds to wait for the response).
+        response = _session.get(base_url, params=params, timeout=(3, 10))
         
         # This is a built-in safety check. If the website returns an error (like 404 Not Found),
         # this line will automatically raise an error that our except block can catch.
@@ -58,7 +80,10 @@ def fetch_api_news(symbols: list, api_key: str) -> pd.DataFrame:
                 'source': item.get('source', 'N/A'),
                 'title': item.get('title', 'N/A'),
                 'link': item.get('url', 'N/A'),
-                'published': pd.to_datetime(item.get('published_at', None), utc=True)
+                # The raw ISO timestamp string is kept as-is here; parsing is
+                # done in one vectorised pd.to_datetime call after the loop,
+                # which is far faster than parsing row by row.
+                'published': item.get('published_at', None)
             }
             all_news_items.append(news_item)
         
@@ -67,15 +92,26 @@ def fetch_api_news(symbols: list, api_key: str) -> pd.DataFrame:
     except requests.exceptions.RequestException as e:
         # If any network error occurred, this code will run.
         print(f"  - Failed to fetch from API. Error: {e}")
-        return pd.DataFrame()
+        return []
+
+    return all_news_items
+
+def fetch_api_news(symbols: list, api_key: str) -> pd.DataFrame:
+    """
+    Fetches news for a specific list of stock symbols from the MarketAux API.
+    """
+    all_news_items = fetch_api_items(symbols, api_key)
 
     if not all_news_items:
         return pd.DataFrame()
 
-    
     # Code below is for data cleaning and structuring.
     # Convert our list of dictionaries into a clean, structured pandas DataFrame.
     df = pd.DataFrame(all_news_items)
+    # Parse every publication date in one vectorised call. MarketAux returns
+    # ISO 8601 timestamps, so we tell pandas the format up front rather than
+    # letting it sniff each string; unparseable dates become NaT ('coerce').
+    df['published'] = pd.to_datetime(df['published'], utc=True, format='ISO8601', errors='coerce')
     # Remove any rows that might be missing a publication date.
     df.dropna(subset=['published'], inplace=True)
     # Sort the articles with the newest ones at the top.
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def find_trade_signals(analysed_df: pd.DataFrame, confidence_threshold: float = 0.90) -> pd.DataFrame:
@@ -6,22 +7,19 @@ def find_trade_signals(analysed_df: pd.DataFrame, confidence_threshold: float =
     A good signal requires both strong sentiment (not neutral) and high confidence
     from the model in its own prediction.
     """
-    # This is a filtering operation. We select rows from the DataFrame
-    # where both of the following conditions are true (the '&' means AND):
+    # This is a filtering operation, done directly on NumPy arrays. We keep
+    # rows where both of the following conditions are true (the '&' means AND):
     # 1. The 'sentiment' column is not equal to 'neutral'.
     # 2. The 'confidence' column is greater than or equal to our threshold.
-    signals = analysed_df[
-        (analysed_df['sentiment'] != 'neutral') &
-        (analysed_df['confidence'] >= confidence_threshold)
-    ].copy()
+    sentiments = analysed_df['sentiment'].to_numpy()
+    confidences = analysed_df['confidence'].to_numpy()
+    mask = (sentiments != 'neutral') & (confidences >= confidence_threshold)
 
     # We add a new 'signal' column to make the trading action explicit.
-    # The .apply() method runs a function on every row of the 'sentiment' column.
-    # The 'lambda' function is a small, anonymous function that checks the value:
-    # if the sentiment is 'positive', it returns 'BUY', otherwise it returns 'SELL'.
-    signals['signal'] = signals['sentiment'].apply(lambda x: 'BUY' if x == 'positive' else 'SELL')
-    
-    return signals
+    # np.where evaluates the whole column in one vectorised pass, and .assign
+    # attaches it as a new frame that shares the existing columns' data -
+    # unlike the old .copy(), which cloned every column of the filtered rows.
+    return analysed_df.loc[mask].assign(signal=np.where(sentiments[mask] == 'positive', 'BUY', 'SELL'))
 
 def rank_signals(signals_df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -29,41 +27,52 @@ def rank_signals(signals_df: pd.DataFrame) -> pd.DataFrame:
     If the bot finds multiple signals in a single run, it needs a logical
     way to decide which one to act on.
     """
-    # This ranks the signals by sorting the DataFrame.
-    # `by='confidence'` tells pandas which column to sort by.
-    # `ascending=False` ensures that the highest confidence score is at the top.
-    ranked_signals = signals_df.sort_values(by='confidence', ascending=False)
-    
+    # This ranks the signals with the highest confidence score at the top.
+    # We argsort the raw confidence array and reorder the frame with .take,
+    # which skips the label-alignment work of sort_values. The stable sort
+    # keeps the original order between equal-confidence signals.
+    order = np.argsort(-signals_df['confidence'].to_numpy(), kind='stable')
+    ranked_signals = signals_df.take(order)
+
     # We reset the index for a clean, 0-based sequence after sorting.
     ranked_signals.reset_index(drop=True, inplace=True)
     return ranked_signals
 
+def check_ma_crossover_values(fast_sma: float, slow_sma: float) -> str:
+    """
+    Gives the Dual Moving Average Crossover verdict for two already-computed
+    SMA values. check_ma_crossover_signal below recomputes the rolling
+    averages from the full price history on every call, which is wasteful when
+    a caller (like the backtester) can precompute them once per ticker and
+    just hand the two numbers in.
+    """
+    # If the fast-moving average (recent trend) is above the slow one (long-term trend),
+    # it's a bullish sign.
+    if fast_sma > slow_sma:
+        return 'BUY'
+    # If the fast-moving average is below the slow one, it's a bearish sign.
+    elif fast_sma < slow_sma:
+        return 'SELL'
+    # Otherwise, the trend is unclear or there's not enough data to calculate the SMAs.
+    else:
+        return 'HOLD'
+
 def check_ma_crossover_signal(price_history: pd.DataFrame, fast_window: int = 20, slow_window: int = 50) -> str:
     """
     Provides a technical confirmation signal based on market trend.
     This uses the Dual Moving Average Crossover strategy from an earlier project on my GitHub.
     The function returns 'BUY', 'SELL', or 'HOLD' based on the crossover of two SMAs.
     """
-    # Copy to avoid modifying the original DataFrame.
-    price_history = price_history.copy()
-    
     # A Simple Moving Average (SMA) is the average closing price over a number of days (the "window").
     # The .rolling() method creates a rolling window, and .mean() calculates the average inside it.
-    price_history['fast_sma'] = price_history['close'].rolling(window=fast_window).mean()
-    price_history['slow_sma'] = price_history['close'].rolling(window=slow_window).mean()
-
+    # We never write anything back to the caller's frame, so there's no need
+    # to defensively copy it - the rolling means are standalone Series.
     # We only care about the most recent value to know the current trend.
     # .iloc[-1] is a pandas command to get the very last item in a Series.
-    last_fast_sma = price_history['fast_sma'].iloc[-1]
-    last_slow_sma = price_history['slow_sma'].iloc[-1]
+    close = price_history['close']
+    last_fast_sma = close.rolling(window=fast_window).mean().iloc[-1]
+    last_slow_sma = close.rolling(window=slow_window).mean().iloc[-1]
 
-    # If the fast-moving average (recent trend) is above the slow one (long-term trend),
-    # it's a bullish sign.
-    if last_fast_sma > last_slow_sma:
-        return 'BUY'
-    # If the fast-moving average is below the slow one, it's a bearish sign.
-    elif last_fast_sma < last_slow_sma:
-        return 'SELL'
-    # Otherwise, the trend is unclear or there's not enough data to calculate the SMAs.
-    else:
-        return 'HOLD'
\ No newline at end of file
+    # The comparison logic itself lives in check_ma_crossover_values so both
+    # the precomputed and the from-scratch paths share one implementation.
+    return check_ma_crossover_values(last_fast_sma, last_slow_sma)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -15,6 +16,30 @@ from alpaca.trading.requests import MarketOrderRequest, TakeProfitRequest, StopL
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
 from alpaca.data.timeframe import TimeFrame
 
+# numba is optional here, just like in the backtester: with it installed the
+# ATR smoothing loop below compiles to native code, without it the same
+# function runs as ordinary Python.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _wilder_ema(tr, alpha):
+    """
+    The smoothed (Wilder) moving average used by the ATR, written as the plain
+    recurrence out[i] = alpha * tr[i] + (1 - alpha) * out[i-1], seeded with the
+    first value. Identical output to ewm(alpha=..., adjust=False).mean(), but
+    the sequential loop is something numba can JIT into a tight native loop.
+    """
+    out = np.empty_like(tr)
+    out[0] = tr[0]
+    for i in range(1, tr.shape[0]):
+        out[i] = alpha * tr[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+if njit is not None:
+    _wilder_ema = njit(cache=True)(_wilder_ema)
+
 def get_broker_api() -> TradingClient:
     """
     Establishes a secure connection to the Alpaca trading API using the
@@ -31,27 +56,28 @@ def get_broker_api() -> TradingClient:
     # I dont enough confidence in this bot to run my real money yet :)
     return TradingClient(api_key, api_secret, paper=True)
 
-def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def calculate_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
     """
-    Calculates the Average True Range (ATR).
+    Calculates the Average True Range (ATR) from the raw price arrays.
     ATR is a key indicator of market volatility. We use it to set dynamic
     stop-loss and take-profit levels that adapt to how much a stock is
     currently moving. A volatile stock gets wider targets, whereas a calm stock gets tighter ones.
+    Taking plain arrays (instead of a DataFrame) means no defensive copy and
+    no throwaway columns - the function just returns the ATR array.
     """
-    df = df.copy()
     # The True Range is the greatest of the following:
     # 1. The current day's high minus the current day's low.
-    df['high-low'] = df['high'] - df['low']
     # 2. The absolute value of the current day's high minus the previous day's close.
-    df['high-prev_close'] = abs(df['high'] - df['close'].shift(1))
     # 3. The absolute value of the current day's low minus the previous day's close.
-    df['low-prev_close'] = abs(df['low'] - df['close'].shift(1))
-    
-    df['tr'] = df[['high-low', 'high-prev_close', 'low-prev_close']].max(axis=1)
-    
+    # np.fmax ignores NaN the same way pandas' max does, so the first day
+    # (which has no previous close) simply falls back to high-low.
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
     # The ATR is a smoothed moving average of the True Range.
-    df['atr'] = df['tr'].ewm(alpha=1/period, adjust=False).mean()
-    return df
+    return _wilder_ema(tr, 1.0 / period)
 
 def execute_trade_signal(api: TradingClient, signal_data: pd.Series, cash_to_use: float):
     """
@@ -76,11 +102,12 @@ def execute_trade_signal(api: TradingClient, signal_data: pd.Series, cash_to_use
         )
         bars = data_client.get_stock_bars(request_params).df
         
-        # We need to ensure the column names are lowercase for our ATR function.
+        # We need to ensure the column names are lowercase before extracting.
         bars.columns = bars.columns.str.lower()
-        bars = calculate_atr(bars, period=14)
-        last_price = bars['close'].iloc[-1]
-        atr = bars['atr'].iloc[-1]
+        close = bars['close'].to_numpy()
+        atr_series = calculate_atr(bars['high'].to_numpy(), bars['low'].to_numpy(), close, period=14)
+        last_price = close[-1]
+        atr = atr_series[-1]
         
         # Below section is for position sizing 
         # We calculate how many shares we can buy/sell with the cash allocated by the live bot.
@@ -89,32 +116,31 @@ def execute_trade_signal(api: TradingClient, signal_data: pd.Series, cash_to_use
 
         # We then define the bracket order
         # A bracket order is a three-part order that automates our risk management.
+        # Take-Profit: 4x the ATR away from the entry price, Stop-Loss: 2x the
+        # ATR the other way (below/above depending on direction). Both levels
+        # are computed and rounded in one np.round call on a 2-element array.
         if signal == 'BUY':
-            order_details = MarketOrderRequest(
-                symbol=symbol,
-                qty=quantity,
-                side=OrderSide.BUY,
-                time_in_force=TimeInForce.GTC, # GTC = "Good 'til Canceled"
-                order_class=OrderClass.BRACKET,
-                # Take-Profit: Set at 4x the ATR above our entry price.
-                take_profit=TakeProfitRequest(limit_price=round(last_price + (atr * 4), 2)),
-                # Stop-Loss: Set at 2x the ATR below our entry price.
-                stop_loss=StopLossRequest(stop_price=round(last_price - (atr * 2), 2))
-            )
+            take_profit_price, stop_loss_price = np.round(
+                np.array([last_price + (atr * 4), last_price - (atr * 2)]), 2)
+            side = OrderSide.BUY
         elif signal == 'SELL':
-            order_details = MarketOrderRequest(
-                symbol=symbol,
-                qty=quantity,
-                side=OrderSide.SELL,
-                time_in_force=TimeInForce.GTC,
-                order_class=OrderClass.BRACKET,
-                take_profit=TakeProfitRequest(limit_price=round(last_price - (atr * 4), 2)),
-                stop_loss=StopLossRequest(stop_price=round(last_price + (atr * 2), 2))
-            )
+            take_profit_price, stop_loss_price = np.round(
+                np.array([last_price - (atr * 4), last_price + (atr * 2)]), 2)
+            side = OrderSide.SELL
         else:
             print(f"Invalid signal '{signal}'. No order placed.")
             return
 
+        order_details = MarketOrderRequest(
+            symbol=symbol,
+            qty=quantity,
+            side=side,
+            time_in_force=TimeInForce.GTC, # GTC = "Good 'til Canceled"
+            order_class=OrderClass.BRACKET,
+            take_profit=TakeProfitRequest(limit_price=float(take_profit_price)),
+            stop_loss=StopLossRequest(stop_price=float(stop_loss_price))
+        )
+
         # Section belwo submitsthe order
         print("Submitting bracket order")
         order = api.submit_order(order_data=order_details)
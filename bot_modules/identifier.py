@@ -1,22 +1,99 @@
+import re
+import sys # for sys.intern, used when freezing the universe below.
+import numpy as np
 import pandas as pd
+from types import MappingProxyType # a read-only view over the universe dict.
 
-def define_stock_universe() -> dict:
+# numba is optional here too: when pyahocorasick is missing but numba is
+# installed, the nested term scan is compiled to native code instead of
+# falling all the way back to the regex path.
+try:
+    from numba import njit
+    from numba.typed import List as NumbaList
+except ImportError:
+    njit = None
+
+def _tag_titles(titles, terms, ticker_ids, n_tickers):
+    """
+    The core matching loop, written so numba can compile it: for every
+    (lowercased) title, test each search term with the string 'in' operator
+    and flag the term's ticker in a small boolean array. Returns one array of
+    matched ticker ids per title, in universe order (which is exactly the
+    order the original Python loop produced).
     """
-    Defines the master list of US stocks that our bot is interested in.
+    out = []
+    for title in titles:
+        seen = np.zeros(n_tickers, dtype=np.bool_)
+        for k in range(len(terms)):
+            if not seen[ticker_ids[k]] and terms[k] in title:
+                seen[ticker_ids[k]] = True
+        out.append(np.nonzero(seen)[0])
+    return out
 
-    The "universe" is the pre-selected group of securities
-    that a strategy is allowed to trade from. 
-    
-    Returns:
-        A dictionary where:
-        - The KEY is the official stock ticker (for ex. 'AAPL') use for trading and getting price data.
-        - The VALUE is a list of lowercase search terms to find that company in news headlines.
+if njit is not None:
+    _tag_titles = njit(cache=True)(_tag_titles)
 
-    The list of stocks here is a small sample, and can be expanded/modified. US/Global stocks were selected
-    as they are more widely covered by the news APIs and RSS feeds that are used in this project. Furthermore,
-    it helps when trading in alpaca as its a US based broker. 
-    """
-    universe = {
+# Lazily-built flat term table for the numba path.
+_numba_terms = None
+
+def _get_numba_terms(stock_universe: dict):
+    global _numba_terms
+    if _numba_terms is None:
+        ticker_names = list(stock_universe.keys())
+        terms = NumbaList()
+        ticker_ids = []
+        for i, search_terms in enumerate(stock_universe.values()):
+            for term in search_terms:
+                terms.append(term)
+                ticker_ids.append(i)
+        _numba_terms = (terms, np.asarray(ticker_ids, dtype=np.int64), ticker_names)
+    return _numba_terms
+
+# pyahocorasick is optional. When it's installed we tag headlines with a
+# single pass of an Aho-Corasick automaton (a DFA that finds every search
+# term in one scan of the text); when it isn't, the plain nested-loop scan
+# below still works, just slower.
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# The automaton is built lazily on first use and then reused for every
+# headline - building it is the only expensive part.
+_automaton = None
+
+def _get_automaton(stock_universe: dict):
+    global _automaton
+    if _automaton is None:
+        _automaton = ahocorasick.Automaton()
+        for ticker, search_terms in stock_universe.items():
+            for term in search_terms:
+                _automaton.add_word(term, (ticker, term))
+        _automaton.make_automaton()
+    return _automaton
+
+# Lazily-built pieces for the vectorised fallback below: the ticker names as
+# an array (for fancy indexing) and one compiled alternation of each ticker's
+# search terms.
+_ticker_names = None
+_ticker_patterns = None
+
+def _get_ticker_patterns(stock_universe: dict):
+    global _ticker_names, _ticker_patterns
+    if _ticker_patterns is None:
+        _ticker_names = np.array(list(stock_universe.keys()))
+        _ticker_patterns = [re.compile('|'.join(map(re.escape, terms)))
+                            for terms in stock_universe.values()]
+    return _ticker_names, _ticker_patterns
+
+# The universe is defined ONCE at import time and frozen. Every caller used
+# to rebuild this dictionary (and all its term lists) on each call to
+# define_stock_universe; now they all share this single read-only mapping.
+# The search terms are interned tuples, so identical strings are stored once
+# and string comparisons against them can short-circuit on identity.
+_UNIVERSE = MappingProxyType({
+    ticker: tuple(sys.intern(term) for term in terms)
+    for ticker, terms in {
         # Tech
         'AAPL': ['apple', 'iphone'],
         'MSFT': ['microsoft', 'windows'],
@@ -42,7 +119,7 @@ def define_stock_universe() -> dict:
         'MCD': ["mcdonald's"],
         'KO': ['coca-cola', 'coke'],
         'DIS': ['disney', 'walt disney'],
-        
+
         # Healthcare
         'JNJ': ['johnson & johnson', 'j&j'],
         'PFE': ['pfizer'],
@@ -59,49 +136,99 @@ def define_stock_universe() -> dict:
 
         # Telecom
         'T': ['at&t']
-    }
-    return universe
+    }.items()
+})
+
+# The plain symbol list, precomputed for callers (like the news manager) that
+# only need the tickers, not the search terms.
+STOCK_SYMBOLS = tuple(_UNIVERSE)
+
+def define_stock_universe() -> dict:
+    """
+    Returns the master list of US stocks that our bot is interested in.
+
+    The "universe" is the pre-selected group of securities
+    that a strategy is allowed to trade from.
+
+    Returns:
+        A read-only dictionary where:
+        - The KEY is the official stock ticker (for ex. 'AAPL') use for trading and getting price data.
+        - The VALUE is a list of lowercase search terms to find that company in news headlines.
+
+    The list of stocks here is a small sample, and can be expanded/modified. US/Global stocks were selected
+    as they are more widely covered by the news APIs and RSS feeds that are used in this project. Furthermore,
+    it helps when trading in alpaca as its a US based broker.
+    """
+    return _UNIVERSE
 
-def tag_headlines_with_tickers(news_df: pd.DataFrame, stock_universe: dict) -> pd.DataFrame:
+def tag_headlines_with_tickers(news_df: pd.DataFrame, stock_universe: dict, filter_empty: bool = False) -> pd.DataFrame:
     """
     Scans news headlines and tags them with stock tickers from our universe.
     This is a simple but effective form of Named Entity Recognition (NER).
+    With filter_empty=True the result keeps only the headlines that matched
+    at least one ticker, fusing the tag and relevance-filter steps into one
+    so callers don't materialise a fully tagged frame just to throw most of
+    it away.
     """
-    # We make a copy of the input DataFrame to avoid modifying the original data. 
-    # without the .copy(), there was errors during development. 
-    news_df = news_df.copy()
-    
     # This list will store our results, one item for each headline.
     tagged_tickers_list = []
-    
-    # We loop through each individual headline in the title column of the DataFrame.
-    for title in news_df['title']:
-        found_tickers_for_this_headline = []
-        
-        # This is an important step for robust matching. We convert the headline to lowercase.
-        # This ensures that "Apple", "apple", and "APPLE" are all treated the same.
-        # We also convert it to a string with str() to prevent errors if a title is not text.
-        title_lower = str(title).lower()
-        
-        # For each headline, we check against every single stock in our universe.
-        for ticker, search_terms in stock_universe.items():
-            # And for each stock, we check all of its possible search terms.
-            for term in search_terms:
-                # The 'in' keyword performs a simple text search.
-                if term in title_lower:
-                    # If we find a match, we add the official ticker to our list.
-                    found_tickers_for_this_headline.append(ticker)
-                    # This 'break' is a small optimisation. Once we've found 'apple',
-                    # we don't need to keep checking for 'iphone' for the same headline,
-                    # so we break out of this inner loop and move to the next stock.
-                    break 
-        
-        # We add the list of tickers found for this one headline to our master list.
-        # The list might be empty if no matches were found.
-        tagged_tickers_list.append(found_tickers_for_this_headline)
-
-    # We create a brand new 'tickers' column in our DataFrame.
+
+    if ahocorasick is not None:
+        # Fast path: one automaton pass per headline. The automaton reports
+        # every matching search term in a single left-to-right scan of the
+        # text, instead of re-scanning the headline once per term. A dict is
+        # used to de-duplicate tickers (both 'apple' and 'iphone' map to
+        # AAPL) while keeping a deterministic, first-match order.
+        automaton = _get_automaton(stock_universe)
+        for title in news_df['title']:
+            title_lower = str(title).lower()
+            found = dict.fromkeys(ticker for _, (ticker, _) in automaton.iter(title_lower))
+            tagged_tickers_list.append(list(found))
+    elif njit is not None and len(news_df) > 0:
+        # Second-fastest path: the nested term scan, but compiled by numba.
+        # The titles are lowercased in one vectorised pass, handed over as a
+        # typed list, and the native-code loop returns ticker-id arrays that
+        # we translate back to ticker strings.
+        terms, ticker_ids, ticker_names = _get_numba_terms(stock_universe)
+        titles = NumbaList(news_df['title'].astype(str).str.lower().tolist())
+        for id_array in _tag_titles(titles, terms, ticker_ids, len(ticker_names)):
+            tagged_tickers_list.append([ticker_names[i] for i in id_array])
+    else:
+        # Fallback path: one vectorised str.contains per ticker over the
+        # whole (lowercased) title column, each using a precompiled
+        # alternation of that ticker's search terms. Every call traverses
+        # the column once in the C regex engine, producing a headlines x
+        # tickers boolean matrix; np.nonzero then yields the (row, ticker)
+        # match pairs in row-major order, which we split into one
+        # universe-ordered ticker list per headline without any per-row
+        # Python matching.
+        ticker_names, patterns = _get_ticker_patterns(stock_universe)
+        lowered = news_df['title'].astype(str).str.lower()
+        mask = np.column_stack([lowered.str.contains(pat, regex=True, na=False).to_numpy()
+                                for pat in patterns]) if len(lowered) else np.empty((0, len(patterns)), dtype=bool)
+        tagged_tickers_list = [[] for _ in range(len(lowered))]
+        rows, cols = np.nonzero(mask)
+        if rows.size:
+            row_ids, starts = np.unique(rows, return_index=True)
+            for row_id, group in zip(row_ids, np.split(ticker_names[cols], starts[1:])):
+                tagged_tickers_list[row_id] = list(group)
+
+    # Fused tag+filter: slice the matched rows out of the parent frame once
+    # and attach only the surviving ticker lists. With copy-on-write the
+    # slice shares data with the parent, so nothing is tagged-then-dropped.
+    if filter_empty:
+        mask = np.fromiter((len(t) > 0 for t in tagged_tickers_list), dtype=bool, count=len(tagged_tickers_list))
+        return news_df.loc[mask].assign(tickers=[t for t in tagged_tickers_list if t])
+
+    # We return a new DataFrame with a 'tickers' column attached via .assign.
     # Each entry in this column is a list, because a single headline might
     # mention multiple companies (for ex. "Microsoft and Google announce partnership").
-    news_df['tickers'] = tagged_tickers_list
-    return news_df
\ No newline at end of file
+    # .assign never mutates the caller's DataFrame, so callers no longer need
+    # to make a defensive full copy before handing their data in - with
+    # pandas copy-on-write enabled the unchanged columns are shared, not
+    # duplicated.
+    # 'has_ticker' is computed here, while we already have the plain Python
+    # lists in hand, so callers can filter with a ready-made boolean column
+    # instead of running a per-row .apply(len) over the object column.
+    return news_df.assign(tickers=tagged_tickers_list,
+                          has_ticker=np.fromiter((len(t) > 0 for t in tagged_tickers_list), dtype=bool, count=len(tagged_tickers_list)))
\ No newline at end of file
@@ -1,11 +1,37 @@
 import os
+import heapq # merging two already-sorted news streams is cheaper than re-sorting everything.
 import pandas as pd
+from operator import itemgetter
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor # Used to overlap the RSS and API fetches.
+
+# pyarrow is optional (pandas itself only recommends it). Arrow-backed string
+# columns store the text in one contiguous buffer instead of a Python object
+# per cell - roughly half the memory, and the vectorised .str operations the
+# pipeline runs downstream (lowercasing, regex matching in the identifier)
+# work directly on the Arrow buffer.
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 # The '.' before the module name is for relative imports
-from .identifier import define_stock_universe
-from .rss_scanner import fetch_rss_feeds
-from .api_client import fetch_api_news
+from .identifier import STOCK_SYMBOLS
+from .rss_scanner import fetch_rss_items
+from .api_client import fetch_api_items
+
+def _sorted_stream(items: list) -> list:
+    """
+    Turns one source's raw news items into (published, item) pairs sorted
+    newest-first. The dates are parsed in a single vectorised call (the two
+    sources hand them over differently - RSS items arrive already parsed, API
+    items as raw ISO strings) and anything without a usable date is dropped
+    here rather than in a DataFrame pass later.
+    """
+    times = pd.to_datetime([item['published'] for item in items], utc=True, format='mixed', errors='coerce')
+    pairs = [(when, item) for when, item in zip(times, items) if pd.notna(when)]
+    pairs.sort(key=itemgetter(0), reverse=True)
+    return pairs
 
 def gather_all_news() -> pd.DataFrame:
     """
@@ -23,35 +49,68 @@ def gather_all_news() -> pd.DataFrame:
         "https://feeds.bbci.co.uk/news/business/rss.xml",
         "https://www.investing.com/rss/news_25.rss"
     ]
-    rss_df = fetch_rss_feeds(rss_urls)
 
-    # The code below fetch targeted news from the API
-    # We then perform a targeted search for news related only to the stocks
+    # The API fetch is the targeted search for news related only to the stocks
     # in our universe. To make sure we don't miss any critical, company-specific news.
     load_dotenv()
     api_key = os.getenv("MARKETAUX_API_KEY")
-    stock_universe = define_stock_universe()
-    api_symbols = list(stock_universe.keys())
-    api_df = fetch_api_news(symbols=api_symbols, api_key=api_key)
+    # The identifier module exposes the frozen symbol tuple directly, so
+    # there's no need to materialise the whole universe just for its keys.
+    api_symbols = list(STOCK_SYMBOLS)
+
+    # The RSS download and the API call don't depend on each other, and both
+    # spend nearly all their time waiting on the network - so they run
+    # concurrently and the whole gathering step takes as long as the slower
+    # of the two, not their sum.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rss_future = pool.submit(fetch_rss_items, rss_urls)
+        api_future = pool.submit(fetch_api_items, api_symbols, api_key)
+        rss_items = rss_future.result()
+        api_items = api_future.result()
 
     # The section below combines and cleans the data from both sources (RSS and news API)
     print("\nCombining all news sources...")
-    # `pd.concat` is a pandas function that stacks DataFrames on top of each other.
-    # `ignore_index=True` is important because it tells pandas to create a fresh
-    # index (0, 1, 2, and so on) for the new, combined DataFrame.
-    combined_df = pd.concat([rss_df, api_df], ignore_index=True)
-    print(f"Total items before de-duplication: {len(combined_df)}")
+    total_items = len(rss_items) + len(api_items)
+    print(f"Total items before de-duplication: {total_items}")
 
-    # De-duplication is a important for data cleaning in this case. The same breaking news story
+    # De-duplication is important for data cleaning in this case. The same breaking news story
     # will appear on multiple feeds. We only want to analyse it once.
-    # `subset=['title']` tells pandas to consider a row a duplicate if its 'title' is identical to another's.
-    # `keep='first'` tells pandas to keep the first instance it finds and discard the subsequent ones.
-    # The `.copy()` prevents a technical warning from pandas about modifying a 'slice' of a DataFrame.
-    final_df = combined_df.drop_duplicates(subset=['title'], keep='first').copy()
-    
-    # This bit below ensures the data is perfectly ordered and indexed.
-    final_df.sort_values(by='published', ascending=False, inplace=True)
-    final_df.reset_index(drop=True, inplace=True)
+    # Each source is sorted newest-first on its own (two small sorts), then
+    # heapq.merge lazily zips the two streams together in one O(n) pass -
+    # cheaper than stacking everything into a DataFrame and re-sorting the
+    # whole table at the end. Deduping happens during the same pass: a set of
+    # seen titles gives an O(1) membership check, and the newest occurrence
+    # of a story wins (ties go to the RSS stream, which is listed first).
+    seen_titles = set()
+    rows = []
+    published = []
+    merged = heapq.merge(_sorted_stream(rss_items), _sorted_stream(api_items),
+                         key=itemgetter(0), reverse=True)
+    for when, item in merged:
+        title = item['title']
+        if title in seen_titles:
+            continue
+        seen_titles.add(title)
+        rows.append(item)
+        published.append(when)
+
+    if not rows:
+        print("No news items were gathered from any source.")
+        return pd.DataFrame()
+
+    # The rows come out of the merge already ordered and date-cleaned, so the
+    # DataFrame needs no further sorting or dropna - just swap the raw
+    # 'published' values for the timestamps parsed in _sorted_stream.
+    final_df = pd.DataFrame(rows)
+    final_df['published'] = pd.DatetimeIndex(published)
+
+    # With pyarrow available, swap the text columns over to Arrow-backed
+    # strings before handing the table to the rest of the pipeline.
+    if pa is not None:
+        try:
+            final_df = final_df.astype({col: 'string[pyarrow]' for col in ('source', 'title', 'link')})
+        except (KeyError, TypeError):
+            pass # An unexpected column layout just keeps the object dtype.
 
     print(f"Total unique items after de-duplication: {len(final_df)}")
     print("News Gathering Process Complete")
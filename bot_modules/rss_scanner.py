@@ -1,28 +1,62 @@
+import asyncio
 import feedparser # specialised library designed to make reading and parsing RSS feeds simple.
 import pandas as pd
 
-def fetch_rss_feeds(feed_urls: list) -> pd.DataFrame:
-    """
-    Fetches news articles from a list of RSS feed URLs.
+# aiohttp is optional. With it installed, all the feeds are downloaded
+# concurrently, so a slow feed no longer holds up every feed behind it -
+# the wall-clock cost becomes roughly the slowest single feed instead of
+# the sum of all of them. Without it we let feedparser download each feed
+# sequentially like before.
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
-    This function takes a list of web addresses for RSS feeds, reads each one,
-    and extracts the key information for each article, like its title and link.
-    It then gathers all the articles into a single, clean table (DataFrame).
+async def _download_one(session, url):
+    # Downloads a single feed's raw bytes; parsing stays synchronous later.
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        return await response.read()
+
+async def _download_all(urls):
+    async with aiohttp.ClientSession() as session:
+        # return_exceptions=True means one broken feed yields its exception
+        # in the results instead of cancelling all the other downloads.
+        return await asyncio.gather(*[_download_one(session, url) for url in urls], return_exceptions=True)
+
+def fetch_rss_items(feed_urls: list) -> list:
+    """
+    Fetches news articles from a list of RSS feed URLs and returns them as a
+    plain list of dicts, one per article. This is the raw-record form used by
+    the news manager, which combines and de-duplicates articles from several
+    sources before building a single DataFrame; fetch_rss_feeds below wraps
+    this when a standalone DataFrame is wanted.
     """
     # It starts with an empty list that will hold all the articles we find.
     all_news_items = []
     print("Fetching news from RSS feeds...")
 
-    # We then loop through each URL that was provided in the feed_urls list.
-    for url in feed_urls:
+    # First, get each feed's content. On the aiohttp path every download runs
+    # concurrently and we hand feedparser the raw bytes; on the fallback path
+    # we hand feedparser the URL and it downloads the feed itself.
+    if aiohttp is not None:
+        downloads = asyncio.run(_download_all(feed_urls))
+    else:
+        downloads = feed_urls
+
+    # We then loop through each feed, pairing it with its URL for logging.
+    for url, content in zip(feed_urls, downloads):
         # A try-except block is really important for network requests. If a website is down
         # or a link is broken, we don't want our whole bot to crash. This block
         # allows the bot to log the error and simply move on to the next URL.
         try:
-            # The feedparser.parse() function downloads the content
-            #  from the URL and interprets the RSS feed's structure.
-            feed = feedparser.parse(url)
-            
+            # A failed concurrent download shows up here as an exception object.
+            if isinstance(content, Exception):
+                raise content
+
+            # The feedparser.parse() function interprets the RSS feed's
+            # structure (and downloads it first, when given a URL).
+            feed = feedparser.parse(content)
+
             # The 'feed' object now contains all the information. The 'entries'
             # attribute is a list, where each item is a single news article.
             for entry in feed.entries:
@@ -35,10 +69,13 @@ def fetch_rss_feeds(feed_urls: list) -> pd.DataFrame:
                     'title': entry.get('title', 'N/A'),
                     # 'entry.link' is the direct web address for the full article.
                     'link': entry.get('link', 'N/A'),
-                    'published': pd.to_datetime(entry.get('published', None), utc=True)
-                    # We convert the publication date into a standardised pandas datetime
-                    # format and set it to the UTC timezone. This prevents timezone-related
-                    # bugs, which I encountered during development :( 
+                    'published': entry.get('published', None)
+                    # The raw date string is kept as-is here. Parsing dates one
+                    # at a time was the slowest part of this loop; consumers
+                    # (fetch_rss_feeds below, and the news manager) parse the
+                    # whole column in a single vectorised pd.to_datetime call
+                    # instead, still normalised to UTC to prevent the
+                    # timezone-related bugs I encountered during development :(
                 }
                 # We add our newly created dictionary to our master list.
                 all_news_items.append(news_item)
@@ -49,14 +86,30 @@ def fetch_rss_feeds(feed_urls: list) -> pd.DataFrame:
             # If anything went wrong in the 'try' block, this code runs.
             print(f"  - Failed to fetch or parse {url}. Error: {e}")
 
+    return all_news_items
+
+def fetch_rss_feeds(feed_urls: list) -> pd.DataFrame:
+    """
+    Fetches news articles from a list of RSS feed URLs.
+
+    This function takes a list of web addresses for RSS feeds, reads each one,
+    and extracts the key information for each article, like its title and link.
+    It then gathers all the articles into a single, clean table (DataFrame).
+    """
+    all_news_items = fetch_rss_items(feed_urls)
+
     if not all_news_items:
         print("No news items were fetched from RSS feeds.")
         return pd.DataFrame()
 
-    # Code below is for some Data Cleaning and structuring. 
+    # Code below is for some Data Cleaning and structuring.
     # Convert our list of dictionaries into a clean pandas DataFrame.
     df = pd.DataFrame(all_news_items)
 
+    # Parse every publication date in one vectorised call (RSS feeds use a
+    # mix of date formats, hence format='mixed'); unparseable dates become
+    # NaT and are dropped just below.
+    df['published'] = pd.to_datetime(df['published'], utc=True, format='mixed', errors='coerce')
     # Remove any rows that might have been missing a publication date.
     df.dropna(subset=['published'], inplace=True)
     # Sort the entire table by date, so the most recent news is always at the top.
@@ -1,6 +1,7 @@
 import pandas as pd
-from sklearn.metrics import accuracy_score, classification_report 
+from sklearn.metrics import accuracy_score, classification_report
 # We import tools from scikit-learn, a major machine learning library, to measure performance.
+from concurrent.futures import ThreadPoolExecutor # Runs the two model evaluations side by side.
 from bot_modules.analyser import analyse_sentiment_of_headlines
 
 def setup_model_from_path(model_path="ProsusAI/finbert"):
@@ -9,13 +10,41 @@ def setup_model_from_path(model_path="ProsusAI/finbert"):
     print(f" Loading model from: {model_path} ")
     try:
         tokenizer = AutoTokenizer.from_pretrained(model_path)
+        # If the optional optimum package is installed, run the model through
+        # ONNX Runtime instead of plain PyTorch. On CPU that roughly halves
+        # inference time per headline, which matters here because evaluation
+        # pushes the whole test set through two models. export=True converts
+        # the checkpoint to ONNX on the fly the first time.
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            model = ORTModelForSequenceClassification.from_pretrained(model_path, export=True)
+            # The analyser keys its sentiment cache on this stamp, keeping
+            # the two evaluated models' results strictly separate.
+            model._sentiment_cache_key = model_path
+            print("Model loaded successfully (ONNX Runtime) ")
+            return tokenizer, model
+        except ImportError:
+            pass
+        except Exception as e:
+            print(f"ONNX export failed ({e}), falling back to PyTorch.")
         model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model._sentiment_cache_key = model_path
         print("Model loaded successfully ")
         return tokenizer, model
     except Exception as e:
         print(f"Failed to load model from {model_path}. Error: {e}")
         return None, None
 
+def _grade_model(model_path, test_df):
+    """ Loads one model and scores the whole test set with it. """
+    tokenizer, model = setup_model_from_path(model_path)
+    if model is None:
+        return None
+    # Evaluation is offline, so we can afford a bigger batch than the
+    # live bot's cautious default - fewer, fuller batches finish sooner.
+    results = analyse_sentiment_of_headlines(test_df.copy(), tokenizer, model, batch_size=64)
+    return results['sentiment'].tolist()
+
 def evaluate():
     """
     Compares the performance of the original FinBERT against our custom model
@@ -24,31 +53,38 @@ def evaluate():
     print(" Evaluating Model Performance ")
 
     # Load the final exam data that neither model has seen before. (20% was used in my case)
-    test_df = pd.read_csv('data/test_dataset.csv')
+    # prepare_data.py now saves Parquet; older CSV splits remain the fallback.
+    try:
+        test_df = pd.read_parquet('data/test_dataset.parquet')
+    except (FileNotFoundError, OSError, ImportError):
+        test_df = pd.read_csv('data/test_dataset.csv')
     true_labels = test_df['label'].tolist()
-    
-    # 1. Grade the OG FinBERT model 
-    original_tokenizer, original_model = setup_model_from_path("ProsusAI/finbert")
-    if original_model:
-        original_results = analyse_sentiment_of_headlines(test_df.copy(), original_tokenizer, original_model)
-        original_predictions = original_results['sentiment'].tolist()
-        
+
+    # The two gradings are completely independent, so they run concurrently:
+    # while one model is still downloading/loading, the other is already
+    # doing inference (PyTorch releases the GIL during the forward pass, so
+    # the two threads genuinely overlap). Roughly halves evaluation time.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        original_future = pool.submit(_grade_model, "ProsusAI/finbert", test_df)
+        custom_future = pool.submit(_grade_model, './my_custom_finbert_model', test_df)
+        original_predictions = original_future.result()
+        custom_predictions = custom_future.result()
+
+    # 1. Grade the OG FinBERT model
+    if original_predictions:
         # accuracy_score gives us a single percentage of correct answers.
         original_accuracy = accuracy_score(true_labels, original_predictions)
-        
+
         print("\n--- Original FinBERT Performance ---")
         print(f"Accuracy: {original_accuracy:.2%}")
         # classification_report gives a more detailed breakdown, showing how well
         # the model performed on each specific category (positive, negative, neutral).
         print(classification_report(true_labels, original_predictions))
 
-    # 2. Grade the custom/trained FinBERT model 
-    custom_tokenizer, custom_model = setup_model_from_path('./my_custom_finbert_model')
-    if custom_model:
-        custom_results = analyse_sentiment_of_headlines(test_df.copy(), custom_tokenizer, custom_model)
-        custom_predictions = custom_results['sentiment'].tolist()
+    # 2. Grade the custom/trained FinBERT model
+    if custom_predictions:
         custom_accuracy = accuracy_score(true_labels, custom_predictions)
-        
+
         print("\n The Custom FinBERT Performance ")
         print(f"Accuracy: {custom_accuracy:.2%}")
         print(classification_report(true_labels, custom_predictions))
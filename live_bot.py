@@ -1,7 +1,17 @@
+import os
 import time
 import pandas as pd
 from alpaca.trading.client import TradingClient
 
+# pybloomfiltermmap3 is optional. A Bloom filter gives the bot a fixed-size
+# "have I seen this link before?" memory (a few MB for millions of links)
+# instead of a Python set that grows forever on a long-running live bot.
+# Without the package we fall back to the original in-memory set.
+try:
+    from pybloomfilter import BloomFilter
+except ImportError:
+    BloomFilter = None
+
 # Imports all the functions from our modules in their respective folders. 
 from bot_modules.news_manager import gather_all_news
 from bot_modules.identifier import define_stock_universe, tag_headlines_with_tickers
@@ -20,11 +30,14 @@ def run_live_pipeline(finbert_tokenizer, finbert_model, stock_universe, trading_
     # So that the bot knows the current situation.
     try:
         positions = trading_api.get_all_positions()
-        # We create a dictionary for fast lookup of our current stock holdings.
-        current_positions = {p.symbol: p for p in positions}
+        # The market value of each holding, keyed by symbol. Converting the
+        # position objects to a float Series once here means the risk checks
+        # below work with plain numbers (.get with a default) instead of
+        # re-parsing Alpaca objects on every lookup.
+        position_values = pd.Series({p.symbol: float(p.market_value) for p in positions}, dtype=float)
         account_details = trading_api.get_account()
         portfolio_value = float(account_details.portfolio_value)
-        print(f"Current positions: {list(current_positions.keys()) or 'None'}")
+        print(f"Current positions: {list(position_values.index) or 'None'}")
         print(f"Portfolio Value: ${portfolio_value:,.2f}")
     except Exception as e:
         print(f"Error fetching portfolio state: {e}")
@@ -37,8 +50,11 @@ def run_live_pipeline(finbert_tokenizer, finbert_model, stock_universe, trading_
         return seen_news_links
 
     # This is a key part of state management. We filter out any articles whose 'link'
-    # is already in our `seen_news_links` memory set. The '~' is a logical NOT.
-    new_articles_df = all_news_df[~all_news_df['link'].isin(seen_news_links)]
+    # is already in our `seen_news_links` memory. The membership test works
+    # for both the Bloom filter and the plain-set fallback, which .isin()
+    # wouldn't.
+    unseen_mask = [link not in seen_news_links for link in all_news_df['link']]
+    new_articles_df = all_news_df.loc[unseen_mask]
     if new_articles_df.empty:
         print("No new news articles found in this cycle.")
         return seen_news_links
@@ -46,8 +62,11 @@ def run_live_pipeline(finbert_tokenizer, finbert_model, stock_universe, trading_
     print(f"Found {len(new_articles_df)} new articles to analyse.")
     
     # (3) This section here runs the "brain" of our bot (analyser and decision_engine)
-    tagged_df = tag_headlines_with_tickers(new_articles_df.copy(), stock_universe)
-    relevant_news_df = tagged_df[tagged_df['tickers'].apply(lambda x: len(x) > 0)].copy()
+    # filter_empty fuses tagging and the relevance filter: only headlines
+    # that matched at least one ticker come back, so there's no intermediate
+    # fully tagged frame in between. (No defensive .copy() needed either -
+    # the tagger never mutates its input.)
+    relevant_news_df = tag_headlines_with_tickers(new_articles_df, stock_universe, filter_empty=True)
 
     if not relevant_news_df.empty:
         analysed_df = analyse_sentiment_of_headlines(relevant_news_df, finbert_tokenizer, finbert_model)
@@ -63,10 +82,9 @@ def run_live_pipeline(finbert_tokenizer, finbert_model, stock_universe, trading_
             max_allocation_per_stock = 0.10  # Max 10% of portfolio in any single stock. 
             cash_for_new_trade = portfolio_value * 0.05 # Use 5% of portfolio value for new trades. 
             # The two values above, I just selected and can be adjusted as required. 
-            current_position_value = 0.0
-            if ticker_to_trade in current_positions:
+            if ticker_to_trade in position_values.index:
                 print(f"Signal found for {ticker_to_trade}, which is already in the portfolio.")
-                current_position_value = float(current_positions[ticker_to_trade].market_value)
+            current_position_value = position_values.get(ticker_to_trade, 0.0)
 
             # The final check to see if this new trade breach our risk limit
             if (current_position_value + cash_for_new_trade) <= (portfolio_value * max_allocation_per_stock):
@@ -79,11 +97,11 @@ def run_live_pipeline(finbert_tokenizer, finbert_model, stock_universe, trading_
                 print(f"SKIPPING TRADE: Adding ${cash_for_new_trade:,.2f} to {ticker_to_trade} would exceed the {max_allocation_per_stock:.0%} allocation limit.")
 
     # (6) This section updates the bot's memory with the news it has just processed
-    # We add all the links from this cycle's news batch to our memory set
-    # so they will be ignored in the future.
-    for link in new_articles_df['link']:
-        seen_news_links.add(link)
-        
+    # We add all the links from this cycle's news batch to our memory
+    # so they will be ignored in the future. (.update works on both the
+    # Bloom filter and the set fallback.)
+    seen_news_links.update(new_articles_df['link'].tolist())
+
     return seen_news_links
 
 def main():
@@ -93,12 +111,37 @@ def main():
     # We set up all the components (AI model, API connections) once at the start
     # to be efficient. We don't want to reload the huge AI model every 10 minutes.
     print("--- Initializing Live Trading Bot ---")
+
+    # Copy-on-write makes pandas share data between DataFrames until one of
+    # them is modified, so slices and .assign results stop triggering full
+    # copies (and the SettingWithCopy warnings that prompted the defensive
+    # .copy() calls sprinkled around earlier versions of this pipeline).
+    pd.set_option('mode.copy_on_write', True)
+
     finbert_tokenizer, finbert_model = setup_finbert_model()
     stock_universe = define_stock_universe()
     trading_api = get_broker_api()
     
-    # This set will act as the bot's long-term memory for news articles.
-    seen_news_links = set()
+    # This acts as the bot's long-term memory for news articles. With the
+    # optional Bloom filter available it's backed by an mmap'd file, so the
+    # memory stays bounded (~a few MB for 10M links) no matter how long the
+    # bot runs, and it even survives restarts. Otherwise we use a plain set,
+    # which works fine but grows without limit over very long runs.
+    if BloomFilter is not None:
+        # Re-open the filter file from the previous run when there is one -
+        # constructing a new BloomFilter over the same path would recreate
+        # the file and forget every link seen before the restart. Only the
+        # very first run (or a corrupt file) builds a fresh filter.
+        bloom_path = '/var/tmp/seen_links.bf'
+        try:
+            seen_news_links = BloomFilter.open(bloom_path) if os.path.exists(bloom_path) \
+                else BloomFilter(10_000_000, 1e-6, bloom_path)
+        except Exception as e:
+            print(f"Could not reopen {bloom_path} ({e}); starting a fresh filter.")
+            seen_news_links = BloomFilter(10_000_000, 1e-6, bloom_path)
+        print("Using persistent Bloom filter for seen-news memory.")
+    else:
+        seen_news_links = set()
     
     # This is the big cycle that keeps the bot running indefinitely until stopped with CTRL+C in the terminal. 
     # This `while True:` loop will run the entire pipeline, then sleep for a set time, then repeat.
@@ -1,4 +1,4 @@
-import pandas as pd
+import csv
 
 def generate_historical_news_dataset():
     """
@@ -31,11 +31,20 @@ def generate_historical_news_dataset():
         {'timestamp': '2023-03-15 09:45:00', 'title': "Apple rumored to be working on a new VR headset", 'tickers': "['AAPL']", 'sentiment': 'positive', 'confidence': 0.91},
         {'timestamp': '2023-03-23 16:00:00', 'title': "US government sues Amazon over monopoly claims", 'tickers': "['AMZN']", 'sentiment': 'negative', 'confidence': 0.98}
     ]
-    df = pd.DataFrame(news_data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    # The rows above are already plain strings in their final form (the
+    # timestamps are 'YYYY-MM-DD HH:MM:SS' and the tickers are stored as
+    # list-literal strings), so csv.DictWriter can stream them straight to
+    # disk. That skips building a whole DataFrame - and importing pandas at
+    # all - just to serialise a static table back out as CSV.
     file_path = 'data/historical_news_dataset.csv' # Corrected path
-    df.to_csv(file_path, index=False)
-    print(f"Successfully created US dataset with {len(df)} entries.")
+    with open(file_path, 'w', newline='') as f:
+        # lineterminator matches pandas' '\n' endings so the file is
+        # byte-identical to what to_csv used to produce.
+        writer = csv.DictWriter(f, fieldnames=['timestamp', 'title', 'tickers', 'sentiment', 'confidence'],
+                                lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(news_data)
+    print(f"Successfully created US dataset with {len(news_data)} entries.")
     print(f"File saved to: {file_path}")
 
 if __name__ == '__main__':
@@ -1,7 +1,8 @@
+import os
 import pandas as pd
 import torch
-from datasets import Dataset
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
+from datasets import Dataset, Value, load_from_disk
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer, DataCollatorWithPadding
 
 def run_finetuning():
     """
@@ -10,19 +11,41 @@ def run_finetuning():
     """
     print("--- Starting FinBERT Fine-Tuning Process ---")
 
-    # 1. Load the custom datasets created by prepare_data.py
-    train_df = pd.read_csv('data/train_dataset.csv')
-    test_df = pd.read_csv('data/test_dataset.csv')
-
     # The model works with numbers, not text labels. We create a map to convert them.
     # positive -> 0, negative -> 1, neutral -> 2
     label_map = {'positive': 0, 'negative': 1, 'neutral': 2}
-    train_df['label'] = train_df['label'].map(label_map)
-    test_df['label'] = test_df['label'].map(label_map)
 
-    # Convert our pandas DataFrames into a special format that the Hugging Face library prefers.
-    train_dataset = Dataset.from_pandas(train_df)
-    test_dataset = Dataset.from_pandas(test_df)
+    # 1. Load the custom datasets created by prepare_data.py
+    # Fastest path: the Arrow copies prepare_data.py saves with the datasets
+    # library. load_from_disk memory-maps them - no parsing step at all.
+    if os.path.isdir('data/splits_arrow'):
+        splits = load_from_disk('data/splits_arrow')
+        def encode_labels(batch):
+            return {'label': [label_map[label] for label in batch['label']]}
+        # map needs to be told the label column is int64 now - without an
+        # explicit target schema it casts the mapped ids back to the stored
+        # string feature ('0'/'1'/'2' as text), which the trainer's collator
+        # can't turn into tensors.
+        features = splits['train'].features.copy()
+        features['label'] = Value('int64')
+        train_dataset = splits['train'].map(encode_labels, batched=True, features=features)
+        test_dataset = splits['test'].map(encode_labels, batched=True, features=features)
+    else:
+        # Otherwise read the Parquet splits (faster to load, smaller on
+        # disk); older CSV splits still work as the final fallback.
+        try:
+            train_df = pd.read_parquet('data/train_dataset.parquet')
+            test_df = pd.read_parquet('data/test_dataset.parquet')
+        except (FileNotFoundError, OSError, ImportError):
+            train_df = pd.read_csv('data/train_dataset.csv')
+            test_df = pd.read_csv('data/test_dataset.csv')
+
+        train_df['label'] = train_df['label'].map(label_map)
+        test_df['label'] = test_df['label'].map(label_map)
+
+        # Convert our pandas DataFrames into a special format that the Hugging Face library prefers.
+        train_dataset = Dataset.from_pandas(train_df)
+        test_dataset = Dataset.from_pandas(test_df)
 
     # 2. Load the base model and tokenizer we want to improve upon.
     model_name = "ProsusAI/finbert"
@@ -31,23 +54,50 @@ def run_finetuning():
 
     # 3. Tokenize the datasets
     # This function takes our text and converts it into numbers the model can understand.
+    # We truncate to 128 tokens (headlines are short, so nothing meaningful is lost)
+    # and deliberately do NOT pad here. Padding every headline to the model's full
+    # length wastes most of the compute on padding tokens; instead the data collator
+    # below pads each batch only up to the longest headline in that batch.
     def tokenize_function(examples):
-        return tokenizer(examples['title'], padding="max_length", truncation=True)
+        return tokenizer(examples['title'], truncation=True, max_length=128)
 
     tokenized_train_dataset = train_dataset.map(tokenize_function, batched=True)
     tokenized_test_dataset = test_dataset.map(tokenize_function, batched=True)
 
+    # The collator handles the per-batch dynamic padding. Padding to a multiple
+    # of 8 keeps the tensor shapes friendly for the GPU's tensor cores.
+    data_collator = DataCollatorWithPadding(tokenizer=tokenizer, pad_to_multiple_of=8)
+
+    # A few options only make sense (or only exist) on a CUDA GPU, so they
+    # are collected separately and merged in when one is available:
+    # - gradient checkpointing recomputes activations in the backward pass
+    #   instead of storing them, trading a little compute for a lot of
+    #   memory headroom (which the bigger batch size spends).
+    # - tf32 lets Ampere-and-newer cards run FP32 matmuls on tensor cores.
+    # - the fused AdamW launches one kernel per step instead of one per
+    #   parameter tensor.
+    gpu_kwargs = {}
+    if torch.cuda.is_available():
+        gpu_kwargs = {
+            'gradient_checkpointing': True,
+            'tf32': True,
+            'optim': 'adamw_torch_fused',
+        }
+
     # 4. Define Training Arguments
     # This is like setting up the "syllabus" for the training process.
     training_args = TrainingArguments(
         output_dir='./results',          # Where to save checkpoints during training.
         num_train_epochs=3,              # How many times to go through the entire training manual.
-        per_device_train_batch_size=2,   # How many examples to show the model at once (kept low for memory).
-        gradient_accumulation_steps=4,   # A technique to simulate a larger batch size without using more memory.
+        per_device_train_batch_size=32,  # Dynamic padding makes batches small enough to fit many more examples at once.
+        gradient_accumulation_steps=1,   # No longer needed to simulate a big batch - the real batch is big now.
         warmup_steps=500,                # How many initial steps to gradually increase the learning rate.
         weight_decay=0.01,               # A regularization technique to prevent overfitting.
         logging_dir='./logs',            # Where to save training logs.
-        eval_strategy="epoch"            # How often to run the "final exam", right after each epoch in this case. 
+        eval_strategy="epoch",           # How often to run the "final exam", right after each epoch in this case.
+        fp16=torch.cuda.is_available(),  # Half-precision training on GPU: ~2x faster and half the memory.
+        dataloader_num_workers=2,        # Prepare the next batches in the background while the GPU trains.
+        **gpu_kwargs
     )
 
     # 5. Create the Trainer
@@ -57,6 +107,7 @@ def run_finetuning():
         args=training_args,
         train_dataset=tokenized_train_dataset,
         eval_dataset=tokenized_test_dataset,
+        data_collator=data_collator,     # Pads each batch to its own longest headline, not the global max.
     )
 
     print("\nStarting Training")
@@ -1,10 +1,98 @@
 ## This file downloads historical price data for all stocks in our universe, so that it can be used for backtesting
 ## This goes in hand with the news timeline
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta # for the up-to-date check on the saved file.
 import yfinance as yf
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter # lets us tune connection pooling for yfinance.
+from concurrent.futures import ProcessPoolExecutor # Spreads parquet encoding across cores.
+
+# One pooled session handed to yfinance, so its per-ticker requests reuse
+# open TCP+TLS connections instead of paying a fresh handshake each time -
+# at ~2KB per response the handshake is most of the cost. (The httpx fast
+# path below already pools connections through its shared AsyncClient.)
+_yf_session = requests.Session()
+_yf_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
 # We import our own function to get the list of stocks we need to download data for.
 from bot_modules.identifier import define_stock_universe
 
+# httpx is optional. With it installed, every ticker's history is fetched
+# from Yahoo's chart endpoint concurrently, so the whole download takes about
+# one round trip instead of yfinance working through the universe behind its
+# internal thread pool. Without it we use yf.download exactly as before.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# pyarrow.dataset is optional: with it we also write the prices as a
+# Parquet dataset partitioned by ticker (data/prices/<ticker>/...), so a
+# consumer interested in one symbol can read just that partition instead of
+# loading the whole universe.
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+except ImportError:
+    pads = None
+
+_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+
+async def _fetch_one_chart(client, ticker: str, period1: int, period2: int) -> pd.DataFrame:
+    """
+    Fetches one ticker's daily bars from Yahoo's chart API and shapes them
+    into a small OHLC DataFrame matching what yf.download produces for a
+    single ticker (auto-adjusted close included when Yahoo provides it).
+    Volume is skipped right here at parse time - the strategy never uses it,
+    so there's no point building a column only to drop it again later.
+    """
+    params = {'period1': period1, 'period2': period2, 'interval': '1d', 'events': 'div,split'}
+    response = await client.get(_CHART_URL.format(ticker=ticker), params=params)
+    response.raise_for_status()
+    result = response.json()['chart']['result'][0]
+    quote = result['indicators']['quote'][0]
+    # The adjusted close (splits/dividends folded in) mirrors auto_adjust=True.
+    close = result['indicators'].get('adjclose', [quote])[0].get('adjclose', quote['close'])
+    index = pd.to_datetime(result['timestamp'], unit='s').normalize()
+    return pd.DataFrame({
+        'Open': quote['open'],
+        'High': quote['high'],
+        'Low': quote['low'],
+        'Close': close,
+    }, index=index)
+
+# Per-ticker download cache. Re-running this script (or the backtester setup)
+# within the TTL serves every ticker from disk with a couple of stat() calls
+# instead of another round of HTTPS requests against Yahoo's rate limits.
+_CACHE_DIR = 'data/_cache'
+_CACHE_TTL_SECONDS = 24 * 60 * 60  # Daily bars don't change more often than daily.
+
+def _cache_path(ticker: str, start_date: str, end_date: str) -> str:
+    return f'{_CACHE_DIR}/{ticker}_{start_date}_{end_date}.parquet'
+
+def _write_one_cache(frame: pd.DataFrame, path: str) -> None:
+    """Process-pool worker: writes one ticker's frame to its cache file."""
+    frame.to_parquet(path)
+
+def _cache_is_fresh(path: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) < _CACHE_TTL_SECONDS
+    except OSError:
+        return False # Missing file (or unreadable) means a fetch is needed.
+
+async def _download_all_charts(tickers: list, start_date: str, end_date: str) -> dict:
+    period1 = int(pd.Timestamp(start_date).timestamp())
+    period2 = int(pd.Timestamp(end_date).timestamp())
+    # One client shares its connection pool across all the concurrent
+    # requests; Yahoo rejects clients without a browser-ish User-Agent.
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=32),
+                                 headers={'User-Agent': 'Mozilla/5.0'},
+                                 timeout=10.0) as client:
+        frames = await asyncio.gather(*[_fetch_one_chart(client, t, period1, period2) for t in tickers])
+    return dict(zip(tickers, frames))
+
 def download_historical_price_data():
     """
     Downloads historical daily price data for all stocks in our universe
@@ -20,28 +108,141 @@ def download_historical_price_data():
     start_date = "2023-01-01"
     end_date = "2023-03-31"
 
+    # Early exit, build-system style: if the saved file was written after the
+    # requested window closed, its daily bars can't have changed - re-running
+    # the script costs one stat() call instead of a full download.
+    out_path = 'data/historical_price_data.parquet'
+    if os.path.exists(out_path) and \
+            datetime.fromtimestamp(os.path.getmtime(out_path)) > datetime.fromisoformat(end_date) + timedelta(days=1):
+        print(f"{out_path} already covers {start_date} to {end_date} - nothing to download.")
+        return
+
     print(f"Fetching data for {len(tickers)} tickers from {start_date} to {end_date}...")
 
     try:
-        # yfinance.download can fetch data for multiple tickers at once.
-        # auto_adjust=True is important: it automatically adjusts the prices for
-        # stock splits and dividends, giving us a cleaner dataset to work with.
-        price_data = yf.download(tickers, start=start_date, end=end_date, auto_adjust=True)
+        # Serve whatever we can from the per-ticker cache first; only the
+        # tickers with a missing or stale cache file go over the network.
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        frames = {}
+        missing = []
+        for ticker in tickers:
+            path = _cache_path(ticker, start_date, end_date)
+            if _cache_is_fresh(path):
+                try:
+                    frames[ticker] = pd.read_parquet(path)
+                    continue
+                except Exception:
+                    pass # Corrupt/unreadable cache file - just re-fetch it.
+            missing.append(ticker)
+
+        if missing:
+            print(f"Downloading {len(missing)} tickers ({len(frames)} served from cache)...")
+
+            # Fast path: hit Yahoo's chart endpoint for every ticker at once.
+            # If httpx is missing, or the endpoint misbehaves, fall through
+            # to the plain yfinance batch download below.
+            fetched = None
+            if httpx is not None:
+                try:
+                    fetched = asyncio.run(_download_all_charts(missing, start_date, end_date))
+                    print(f"Fetched {len(missing)} tickers concurrently from the chart API.")
+                except Exception as e:
+                    print(f"Concurrent chart fetch failed ({e}). Falling back to yfinance.")
+
+            if fetched is None:
+                # yfinance.download can fetch data for multiple tickers at once.
+                # auto_adjust=True is important: it automatically adjusts the prices for
+                # stock splits and dividends, giving us a cleaner dataset to work with.
+                raw = yf.download(missing, start=start_date, end=end_date, auto_adjust=True,
+                                  session=_yf_session)
+                if raw.empty:
+                    fetched = {}
+                else:
+                    # Select just the OHLC fields up front (a cheap column
+                    # view) so Volume never makes it into the per-ticker
+                    # frames or their cache files.
+                    raw = raw.loc[:, pd.IndexSlice[['Open', 'High', 'Low', 'Close'], :]]
+                    fetched = {t: raw.xs(t, axis=1, level=1) for t in missing}
+
+            # Keep the fresh frames and write each one back to its cache
+            # file, so the next run inside the TTL skips the network.
+            # Parquet encoding (compression especially) is CPU-bound Python
+            # work, so the per-ticker writes are farmed out to a process
+            # pool - each worker encodes its frame independently and the
+            # writes scale with the number of cores.
+            frames.update(fetched)
+            if fetched:
+                try:
+                    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                        writes = [pool.submit(_write_one_cache, frame, _cache_path(ticker, start_date, end_date))
+                                  for ticker, frame in fetched.items()]
+                        for write in writes:
+                            write.result()
+                except Exception:
+                    pass # No parquet engine - caching is a nicety, not a must.
+        else:
+            print(f"All {len(tickers)} tickers served from cache.")
 
         # A check to ensure the download was successful and returned data.
-        if price_data.empty:
+        if not frames:
             print("\nError: No data was downloaded. Tickers might be incorrect or no data available for the period.")
             return
 
-        # We can drop the 'Volume' column to keep our data file smaller, as our
-        # current strategy doesn't use it. 'level=0' is needed because the columns have multiple levels.
+        # Stack the per-ticker frames side by side and swap the levels so the
+        # columns come out as (field, ticker), same as yf.download.
+        price_data = pd.concat(frames.values(), axis=1, keys=frames.keys()).swaplevel(axis=1).sort_index(axis=1)
+
+        # Neither fetch path produces a 'Volume' column any more, but cache
+        # files written by older versions of this script may still carry
+        # one - drop it if present so the saved file stays lean. Checking
+        # membership beats try/except here: one index lookup, no exception
+        # machinery, and no warning noise in the common no-Volume case.
+        # 'level=0' is needed because the columns have multiple levels.
+        if 'Volume' in price_data.columns.get_level_values(0):
+            price_data = price_data.drop(columns='Volume', level=0)
+
+        # Parquet is the preferred sink: it's a compressed columnar binary
+        # format, so the file is several times smaller than the CSV and the
+        # backtester reads it back without re-parsing text every run.
+        # Parquet wants a flat schema, so the ('Close', 'AAPL') style
+        # MultiIndex columns are joined into 'Close_AAPL' names - the
+        # backtester splits them back apart on load. If the parquet engine
+        # isn't available we fall back to the original CSV.
         try:
-            price_data.drop(columns=['Volume'], inplace=True, level=0)
-        except KeyError:
-            print("Warning: 'Volume' column not found to drop. Proceeding without it.")
+            flat_data = price_data.copy()
+            flat_data.columns = ['_'.join(c) for c in flat_data.columns]
+            file_path = 'data/historical_price_data.parquet'
+            flat_data.to_parquet(file_path, engine='pyarrow', compression='zstd', compression_level=3)
+        except Exception as e:
+            print(f"Parquet write failed ({e}). Saving as CSV instead.")
+            file_path = 'data/historical_price_data.csv'
+            price_data.to_csv(file_path)
 
-        file_path = 'data/historical_price_data.csv'
-        price_data.to_csv(file_path)
+        # Besides the single wide file the backtester reads, also write a
+        # partitioned dataset: one hive-style directory per ticker
+        # (data/prices/ticker=AAPL/...), long format. Hive flavour matters:
+        # plain ds.dataset() discovery reads the ticker field back from the
+        # directory names, so a reader can do ds.dataset('data/prices')
+        # .to_table(filter=ds.field('ticker') == 'AAPL') and touch only
+        # that partition's bytes. Purely additive - failures don't matter.
+        if pads is not None:
+            try:
+                # stack pivots the ticker level of the columns into rows,
+                # turning the two-level panel into a flat
+                # (Date, ticker, Open, High, Low, Close) table - no
+                # MultiIndex for consumers to reason about, and the repeated
+                # ticker values compress away in Parquet's dictionary
+                # encoding.
+                long_data = (price_data.stack(level=1, future_stack=True)
+                             .rename_axis(['Date', 'ticker'])
+                             .reset_index())
+                pads.write_dataset(pa.Table.from_pandas(long_data, preserve_index=False),
+                                   'data/prices', format='parquet',
+                                   partitioning=pads.partitioning(pa.schema([('ticker', pa.string())]), flavor='hive'),
+                                   existing_data_behavior='overwrite_or_ignore')
+                print("Partitioned per-ticker dataset written to data/prices/.")
+            except Exception as e:
+                print(f"Could not write the partitioned dataset ({e}).")
 
         print(f"\nSuccessfully downloaded price data.")
         print(f"File saved to: {file_path}")
@@ -1,5 +1,24 @@
+import os
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+# pyarrow's CSV reader is optional. It tokenizes the file across all CPU
+# cores and parses straight into Arrow buffers, which makes loading a large
+# labeled corpus several times faster (and lighter on memory) than pandas'
+# single-threaded C parser. Without pyarrow we read the file as before.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+# The HuggingFace datasets library is optional in this script. When present,
+# the splits are additionally saved in its Arrow on-disk format, which the
+# fine-tuning script memory-maps directly - no CSV/Parquet parsing at all.
+try:
+    from datasets import Dataset, DatasetDict
+except ImportError:
+    DatasetDict = None
 
 def split_dataset():
     """
@@ -9,29 +28,98 @@ def split_dataset():
     test the final model on data it has never seen before.
     """
     print("--- Preparing data for fine-tuning ---")
+
+    # Early exit: if both split files are newer than the labeled dataset
+    # they were cut from, re-running would just reproduce them - so don't.
+    # The split is deterministic (hash-based), making this safe.
+    outputs = ('data/train_dataset.parquet', 'data/test_dataset.parquet')
+    try:
+        source_mtime = os.path.getmtime('labeled_news_dataset.csv')
+        if all(os.path.getmtime(path) > source_mtime for path in outputs):
+            print("Train/test splits are already up to date - nothing to do.")
+            return
+    except OSError:
+        pass # A missing file on either side means the split has to run.
+
     try:
         # Load the large dataset you created
-        df = pd.read_csv('labeled_news_dataset.csv')
+        if pacsv is not None:
+            # Asking Arrow for a dictionary-encoded label column means it
+            # arrives in pandas as a categorical straight away.
+            table = pacsv.read_csv('labeled_news_dataset.csv',
+                                   read_options=pacsv.ReadOptions(use_threads=True),
+                                   convert_options=pacsv.ConvertOptions(
+                                       include_columns=['title', 'label'],
+                                       column_types={'label': pa.dictionary(pa.int32(), pa.string())}))
+            df = table.to_pandas()
+        else:
+            # memory_map lets the C parser read straight out of the kernel's
+            # mapping of the file instead of copying chunks into userspace
+            # buffers first - lower peak memory for a large corpus. Spelling
+            # out usecols/dtype skips the type-inference pass and parses only
+            # the two columns fine-tuning actually needs, with the label
+            # landing as a categorical straight away.
+            df = pd.read_csv('labeled_news_dataset.csv', memory_map=True,
+                             usecols=['title', 'label'],
+                             dtype={'title': 'string', 'label': 'category'})
     except FileNotFoundError:
         print("Error: `labeled_news_dataset.csv` not found. Please create it first.")
         return
 
-    # A 80/20 split is a standard practice in machine learning
-    train_df, test_df = train_test_split(
-        df,
-        test_size=0.2,      # 20% of the data will be for testing
-        random_state=42,    # Ensures the split is the same every time we run it
-        stratify=df['label'] # Ensures the proportion of pos/neg/neu is the same in both sets
-    )
+    # There are only three distinct labels, so storing the column as a
+    # categorical replaces every Python string with a small integer code.
+    # Stratifying on those codes below lets scikit-learn bucket rows by
+    # integer comparison instead of hashing label strings row by row.
+    df['label'] = df['label'].astype('category')
+
+    # A 80/20 split is a standard practice in machine learning.
+    # Instead of pulling in all of scikit-learn just for train_test_split,
+    # the split is done with a content hash: every headline gets a stable
+    # 64-bit hash, and within each label class the 20% of rows with the
+    # smallest hashes become the test set. That keeps the split exactly
+    # stratified AND deterministic (the same headline always lands on the
+    # same side, even across re-runs or machines - no random_state needed).
+    hashes = pd.util.hash_pandas_object(df['title'], index=False).to_numpy()
+    test_mask = np.zeros(len(df), dtype=bool)
+    for positions in df.groupby('label', observed=True).indices.values():
+        cut = max(1, int(round(len(positions) * 0.2))) # 20% of this class for testing.
+        test_mask[positions[np.argsort(hashes[positions], kind='stable')[:cut]]] = True
+    train_df = df[~test_mask]
+    test_df = df[test_mask]
+
+    # Save the new datasets to separate files. Parquet with snappy
+    # compression writes faster and smaller than CSV, and the fine-tuning
+    # and evaluation scripts read it back without re-parsing text. If no
+    # parquet engine is available we fall back to the original CSVs, which
+    # those scripts still accept.
+    try:
+        train_df.to_parquet('data/train_dataset.parquet', compression='snappy', index=False)
+        test_df.to_parquet('data/test_dataset.parquet', compression='snappy', index=False)
+        saved = "`train_dataset.parquet` and `test_dataset.parquet`"
+    except Exception as e:
+        print(f"Parquet write failed ({e}). Saving as CSV instead.")
+        train_df.to_csv('data/train_dataset.csv', index=False)
+        test_df.to_csv('data/test_dataset.csv', index=False)
+        saved = "`train_dataset.csv` and `test_dataset.csv`"
 
-    # Save the new datasets to separate files
-    train_df.to_csv('data/train_dataset.csv', index=False)
-    test_df.to_csv('data/test_dataset.csv', index=False)
+    # Also land the splits straight in the datasets Arrow cache format. The
+    # labels go back to plain strings first so the fine-tuning script sees
+    # the same values it reads from the Parquet/CSV files.
+    if DatasetDict is not None:
+        try:
+            splits = DatasetDict({
+                'train': Dataset.from_pandas(train_df.assign(label=train_df['label'].astype(str)), preserve_index=False),
+                'test': Dataset.from_pandas(test_df.assign(label=test_df['label'].astype(str)), preserve_index=False),
+            })
+            splits.save_to_disk('data/splits_arrow')
+            print("Arrow copies of the splits saved to data/splits_arrow.")
+        except Exception as e:
+            print(f"Could not save the Arrow splits ({e}).")
 
     print(f"Data split complete.")
     print(f"Training set size: {len(train_df)}")
     print(f"Testing set size: {len(test_df)}")
-    print("Files `train_dataset.csv` and `test_dataset.csv` created.")
+    print(f"Files {saved} created.")
 
 if __name__ == '__main__':
     split_dataset()
\ No newline at end of file